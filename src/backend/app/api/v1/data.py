@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
@@ -19,13 +19,32 @@ def get_table_data(
     search: Optional[str] = Query(None, description="Terme de recherche"),
     sort_by: Optional[str] = Query(None, description="Colonne pour le tri"),
     sort_order: str = Query("asc", regex="^(asc|desc)$", description="Ordre de tri (asc ou desc)"),
+    columns: Optional[List[str]] = Query(None, description="Colonnes renvoyées: columns=a,b ou columns=a&columns=b (toutes par défaut)"),
+    filters: Optional[List[str]] = Query(
+        None,
+        alias="filter",
+        description="Filtre par colonne (répétable): colonne:valeur, colonne:in:v1|v2, colonne:range:min..max, "
+                    "colonne:isnull:true|false, colonne:prefix:debut",
+    ),
+    pagination: str = Query("offset", regex="^(offset|cursor)$", description="offset (skip/limit) ou cursor (pagination par clé)"),
+    cursor: Optional[str] = Query(None, description="next_cursor / prev_cursor de la page précédente (pagination=cursor)"),
+    count: str = Query("exact", regex="^(exact|estimated|cached)$", description="Calcul du total: exact, estimated ou cached"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
-    Récupère les données d'une table avec pagination, recherche et tri.
+    Récupère les données d'une table avec pagination, recherche, filtres et tri.
     
     Tables disponibles : insertion, etudiants, mobilite
+
+    columns: projection (seules ces colonnes sont lues et renvoyées).
+    filter: filtres combinés par AND, valeurs toujours liées (les index des colonnes filtrées sont utilisables).
+
+    pagination=cursor: pagination par clé (tri + clé primaire), rapide à toute profondeur.
+    La réponse contient next_cursor / prev_cursor à repasser dans `cursor` (skip est ignoré).
+
+    count=estimated: total instantané tiré des statistiques PostgreSQL (total_estimated=true) ;
+    count=cached: total exact mis en cache jusqu'au prochain import de la table.
     """
     return service.get_table_data(
         db=db,
@@ -34,5 +53,10 @@ def get_table_data(
         limit=limit,
         search=search,
         sort_by=sort_by,
-        sort_order=sort_order
+        sort_order=sort_order,
+        filters=filters,
+        pagination=pagination,
+        cursor=cursor,
+        count=count,
+        projection=columns,
     )
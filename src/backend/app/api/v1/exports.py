@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import Response
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.services.csv_export_service import CsvExportService
+from app.services.columnar_export_service import ColumnarExportService, COLUMNAR_MEDIA_TYPES
+from app.dao.table_version_dao import TableVersionDao
+from app.utils.compression import compress_stream, compressed_response_meta
+from app.utils.http_cache import as_bytes, cached_export_response, make_etag
 
 router = APIRouter()
 service = CsvExportService()
+columnar_service = ColumnarExportService()
+version_dao = TableVersionDao()
 
 
 @router.get("/csv")
@@ -16,16 +23,101 @@ def export_table_csv(
     table: str = Query(..., description="Nom de la table à exporter"),
     delimiter: str = Query(";", description="Délimiteur CSV: ';' ',' ou '\\t'"),
     bom: bool = Query(True, description="Ajouter un BOM UTF-8 (utile pour Excel)"),
+    columns: Optional[List[str]] = Query(None, description="Colonnes à exporter, dans l'ordre (columns=a,b ou répété)"),
+    search: Optional[str] = Query(None, description="Terme de recherche (comme /data/{table})"),
+    sort_by: Optional[str] = Query(None, description="Colonne pour le tri"),
+    sort_order: str = Query("asc", regex="^(asc|desc)$", description="Ordre de tri (asc ou desc)"),
+    filters: Optional[List[str]] = Query(None, alias="filter", description="Filtre par colonne: colonne:valeur (répétable)"),
+    compression: Optional[str] = Query(None, regex="^(gzip|zstd)$", description="Compression à la volée: gzip ou zstd"),
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Export CSV d'une table, envoyé en flux (curseur côté serveur):
+    la mémoire utilisée ne dépend pas de la taille de la table.
+
+    search / sort_by / filter: mêmes paramètres que GET /data/{table} ;
+    columns: projection. Seul le sous-ensemble demandé est lu en base.
+
+    compression=gzip|zstd: compression au fil du flux. Si le client l'accepte
+    (Accept-Encoding), réponse avec Content-Encoding ; sinon fichier .csv.gz / .csv.zst.
+
+    ETag calculé à partir de la version des données de la table (incrémentée par
+    les imports et suppressions): If-None-Match -> 304, exports récents servis depuis le cache disque.
+    """
+    # paramètres validés (400) avant l'ETag: une requête invalide n'obtient jamais de 304
+    service.prepare_query(
+        db,
+        table,
+        delimiter=delimiter,
+        columns=columns,
+        search=search,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        filters=filters,
+    )
+
+    filename = f"{table}.csv"
+    media_type = "text/csv; charset=utf-8"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compression:
+        media_type, headers = compressed_response_meta(compression, accept_encoding, filename, media_type)
+
+    version = version_dao.get_versions(db, [table])[table]
+    etag = make_etag(
+        "csv", table, version, delimiter, bom, columns, search, sort_by, sort_order, filters,
+        compression, headers.get("Content-Encoding"),
+    )
+
+    def _produce():
+        chunks = service.stream_csv(
+            table=table,
+            delimiter=delimiter,
+            include_bom=bom,
+            columns=columns,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            filters=filters,
+        )
+        if compression:
+            return compress_stream(chunks, compression)
+        return as_bytes(chunks)
+
+    return cached_export_response(etag, if_none_match, media_type, headers, _produce)
+
+
+@router.get("/parquet")
+def export_table_parquet(
+    table: str = Query(..., description="Nom de la table à exporter"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Export Parquet d'une table (types des modèles, record batches en flux). Nécessite pyarrow."""
+    return _columnar_response(db, table, "parquet", if_none_match)
+
+
+@router.get("/arrow")
+def export_table_arrow(
+    table: str = Query(..., description="Nom de la table à exporter"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    result = service.export_csv(db=db, table=table, delimiter=delimiter, include_bom=bom)
-
-    filename = f"{result['table']}.csv"
-    return Response(
-        content=result["csv"],
-        media_type="text/csv; charset=utf-8",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
-        },
+    """Export Arrow IPC (format fichier / Feather v2) d'une table. Nécessite pyarrow."""
+    return _columnar_response(db, table, "arrow", if_none_match)
+
+
+def _columnar_response(db: Session, table: str, file_format: str, if_none_match: Optional[str]):
+    columnar_service.check_export(table, file_format)
+    version = version_dao.get_versions(db, [table])[table]
+    return cached_export_response(
+        make_etag(file_format, table, version),
+        if_none_match,
+        COLUMNAR_MEDIA_TYPES[file_format],
+        {"Content-Disposition": f'attachment; filename="{table}.{file_format}"'},
+        lambda: columnar_service.stream_table(table=table, file_format=file_format),
     )
@@ -1,21 +1,45 @@
-from fastapi import APIRouter, Depends, File, UploadFile, status
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile, status
+from fastapi.responses import JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.services.csv_import_service import CsvImportService
+from app.services.csv_import_service import CsvImportService, build_error_report_csv
+from app.services.import_bundle_service import ImportBundleService
+from app.services.import_job_service import ImportJobService
 
 router = APIRouter()
 service = CsvImportService()
+job_service = ImportJobService()
+bundle_service = ImportBundleService()
+
+
+def _dry_run_response(report: dict, table: str, report_format: str):
+    """Rapport du dry-run: JSON (défaut) ou CSV téléchargeable."""
+    if report_format == "csv":
+        return Response(
+            content=build_error_report_csv(report),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="import_report_{table}.csv"'},
+        )
+    return report
 
 
 @router.post(
     "/csv",
     status_code=status.HTTP_200_OK,
 )
-async def upload_csv(
+def upload_csv(
     table: str,
+    mode: str = Query("batch", regex="^(batch|row|bulk)$", description="Mode d'import: batch (lots multi-lignes), row (ligne par ligne) ou bulk (COPY + staging)"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Nombre de lignes par lot (mode batch)"),
+    background: bool = Query(False, description="Lancer l'import en arrière-plan et retourner un job (202)"),
+    dry_run: bool = Query(False, description="Valider le fichier sans rien écrire en base"),
+    report_format: str = Query("json", regex="^(json|csv)$", description="Format du rapport de dry-run"),
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),  # ✅ login required (no grade required)
     db: Session = Depends(get_db),
@@ -25,8 +49,139 @@ async def upload_csv(
 
     Query param:
       - table=insertion|etudiants|mobilite
+      - mode=batch|row|bulk (défaut: batch)
+      - batch_size=<n> (défaut: IMPORT_BATCH_SIZE)
+      - background=true : retourne immédiatement un job (voir /jobs/{id})
+      - dry_run=true : validation complète sans accès base, toutes les erreurs
+        sont rapportées (report_format=json|csv)
 
     Multipart:
       - file=<csv>
     """
-    return await service.import_csv(db=db, table=table, file=file)
+    # Endpoint synchrone: exécuté dans le threadpool, il ne bloque plus la boucle d'événements
+    if dry_run:
+        report = service.import_stream(db=db, table=table, stream=file.file, dry_run=True)
+        return _dry_run_response(report, table, report_format)
+    if background:
+        job = job_service.submit(
+            table=table,
+            file=file,
+            current_user=current_user,
+            mode=mode,
+            batch_size=batch_size,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(job.to_dict()),
+        )
+    return service.import_stream(db=db, table=table, stream=file.file, mode=mode, batch_size=batch_size)
+
+
+@router.post(
+    "/xlsx",
+    status_code=status.HTTP_200_OK,
+)
+def upload_xlsx(
+    table: str,
+    sheet: Optional[str] = Query(None, description="Nom de la feuille à importer (feuille active par défaut)"),
+    mode: str = Query("batch", regex="^(batch|row|bulk)$", description="Mode d'import: batch (lots multi-lignes), row (ligne par ligne) ou bulk (COPY + staging)"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Nombre de lignes par lot (mode batch)"),
+    background: bool = Query(False, description="Lancer l'import en arrière-plan et retourner un job (202)"),
+    dry_run: bool = Query(False, description="Valider le classeur sans rien écrire en base"),
+    report_format: str = Query("json", regex="^(json|csv)$", description="Format du rapport de dry-run"),
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Upload d'un classeur XLSX + import vers la table cible (lecture openpyxl read_only).
+    Mêmes en-têtes, validations et modes d'import que pour le CSV.
+
+    Query param:
+      - table=insertion|etudiants|mobilite
+      - sheet=<nom de feuille> (optionnel)
+      - mode, batch_size, background, dry_run, report_format: voir /csv
+
+    Multipart:
+      - file=<xlsx>
+    """
+    if dry_run:
+        report = service.import_stream(
+            db=db,
+            table=table,
+            stream=file.file,
+            file_format="xlsx",
+            sheet=sheet,
+            dry_run=True,
+        )
+        return _dry_run_response(report, table, report_format)
+    if background:
+        job = job_service.submit(
+            table=table,
+            file=file,
+            current_user=current_user,
+            mode=mode,
+            batch_size=batch_size,
+            file_format="xlsx",
+            sheet=sheet,
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(job.to_dict()),
+        )
+    return service.import_stream(
+        db=db,
+        table=table,
+        stream=file.file,
+        mode=mode,
+        batch_size=batch_size,
+        file_format="xlsx",
+        sheet=sheet,
+    )
+
+
+@router.post(
+    "/bundle",
+    status_code=status.HTTP_200_OK,
+)
+def upload_bundle(
+    files: List[UploadFile] = File(..., description="Fichiers CSV/XLSX (ou un ZIP) nommés d'après la table: etudiants.csv, mobilite.xlsx..."),
+    sheet: Optional[str] = Query(None, description="Feuille à lire dans les fichiers XLSX (feuille active par défaut)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Import groupé et atomique de plusieurs tables.
+
+    La table de chaque fichier est déduite de son nom (etudiants*, mobilite*, insertion*).
+    Les fichiers sont lus et validés en parallèle, puis toutes les tables sont
+    publiées dans une seule transaction: soit tout est importé, soit rien.
+
+    Multipart:
+      - files=<csv|xlsx|zip> (répétable)
+    """
+    return bundle_service.import_bundle(db=db, files=files, sheet=sheet)
+
+
+@router.get("/jobs")
+def list_import_jobs(current_user: User = Depends(get_current_user)):
+    """Liste les jobs d'import connus du serveur (les plus récents d'abord)."""
+    return [job.to_dict() for job in job_service.list_jobs()]
+
+
+@router.get("/jobs/{job_id}")
+def get_import_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Avancement d'un job d'import: lignes traitées, lignes/s, nombre d'erreurs,
+    ETA, et résultat final une fois terminé.
+    """
+    return job_service.get_job(job_id).to_dict()
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_import_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Demande l'annulation d'un job d'import.
+    Les lots déjà commités restent en base (mode batch/row) ; en mode bulk rien n'est importé.
+    """
+    return job_service.cancel_job(job_id, current_user).to_dict()
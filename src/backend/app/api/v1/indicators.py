@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
-from app.api.deps import get_current_user, require_role
+from app.api.deps import get_current_user, require_role, require_admin
+from app.core.indicator_cache import indicator_cache
 from app.models.user import User, UserRole
 from app.schemas.indicator import IndicatorCreate, IndicatorUpdate, IndicatorResponse
 from app.services.indicator_service import IndicatorService
@@ -19,10 +20,23 @@ execution_service = IndicatorExecutionService()
 def list_indicators(
     skip: int = 0,
     limit: int = 100,
+    table: Optional[str] = Query(None, description="Seulement les indicateurs qui lisent cette table"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return service.list_indicators(db, skip=skip, limit=limit)
+    return service.list_indicators(db, skip=skip, limit=limit, table=table)
+
+# ⚠️ déclarées avant /{indicator_id} (sinon "cache" serait lu comme un ID)
+@router.get("/cache/stats")
+def get_indicator_cache_stats(current_user: User = Depends(get_current_user)):
+    """Statistiques du cache des résultats d'indicateurs (entrées, taille, hits / misses)."""
+    return indicator_cache.stats()
+
+@router.delete("/cache", status_code=status.HTTP_204_NO_CONTENT)
+def clear_indicator_cache(current_user: User = Depends(require_admin)):
+    """Vide le cache des résultats d'indicateurs (normalement inutile: invalidation par version)."""
+    indicator_cache.clear()
+    return None
 
 @router.get("/{indicator_id}", response_model=IndicatorResponse)
 def get_indicator(
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_admin
+from app.core.schema_catalog import schema_catalog
 from app.models.user import User
 from app.dao.metadata_dao import MetadataDao
 
@@ -21,4 +22,13 @@ def get_columns(table: str, current_user: User = Depends(get_current_user)):
 
 @router.post("/columns", response_model=List[str])
 def get_columns_for_tables(tables: List[str], current_user: User = Depends(get_current_user)):
-    return dao.get_columns_for_tables(tables)
\ No newline at end of file
+    return dao.get_columns_for_tables(tables)
+
+@router.post("/schema/refresh")
+def refresh_schema_catalog(table: Optional[str] = None, current_user: User = Depends(require_admin)):
+    """
+    Invalide le catalogue des colonnes réelles (à appeler après une DDL / migration).
+    Sans paramètre, toutes les tables sont relues au prochain accès.
+    """
+    schema_catalog.invalidate(table)
+    return {"status": "ok", "invalidated": table or "all"}
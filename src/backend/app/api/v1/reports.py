@@ -1,7 +1,6 @@
-from fastapi import APIRouter, Depends, status, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import json
 import io
@@ -19,12 +18,31 @@ from app.schemas.report import (
 )
 from app.services.report_service import ReportService
 from app.services.indicator_execution_service import IndicatorExecutionService
+from app.services.columnar_export_service import ColumnarExportService
+from app.services.excel_report_writer import iter_temp_file, write_report_xlsx
+from app.utils.compression import compress_stream, compressed_response_meta, iter_bytes
+from app.utils.http_cache import cached_export_response, make_etag
+from app.dao.metadata_dao import MetadataDao
 from app.dao.report_dao import ReportDao
+from app.dao.table_version_dao import TableVersionDao
 
 router = APIRouter()
 service = ReportService()
 execution_service = IndicatorExecutionService()
 report_dao = ReportDao()
+columnar_service = ColumnarExportService()
+version_dao = TableVersionDao()
+metadata_dao = MetadataDao()
+
+
+# format -> (type MIME, nom du fichier)
+_EXPORT_FILES = {
+    "json": ("application/json", "report_{id}.json"),
+    "csv": ("text/csv; charset=utf-8", "report_{id}.csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "report_{id}.xlsx"),
+    "parquet": ("application/zip", "report_{id}_parquet.zip"),
+    "arrow": ("application/zip", "report_{id}_arrow.zip"),
+}
 
 
 @router.get("/", response_model=List[ReportResponse])
@@ -120,14 +138,34 @@ def generate_report(
     
     # Récupérer les indicateurs avec leur configuration
     indicators_with_config = report_dao.get_indicators_with_config(db, report_id)
+
+    # Indicateurs scalaires d'une même table: un seul parcours (requêtes fusionnées)
+    from app.core.database import SessionLocal
+    fused_db = SessionLocal()
+    try:
+        fused_results = execution_service.execute_fused(
+            fused_db, [item['indicator'] for item in indicators_with_config]
+        )
+    except Exception:
+        # optimisation seulement: en cas d'échec, chaque indicateur est exécuté seul
+        fused_results = {}
+    finally:
+        fused_db.close()
     
     # Exécuter chaque indicateur
     results = []
     for item in indicators_with_config:
         indicator = item['indicator']
+        if indicator.id in fused_results:
+            results.append({
+                "indicator_id": indicator.id,
+                "indicator_title": indicator.title,
+                "chart_type": item['chart_type'],
+                "execution_result": fused_results[indicator.id]
+            })
+            continue
         try:
             # Créer une nouvelle session pour chaque indicateur pour éviter les transactions abortées
-            from app.core.database import SessionLocal
             indicator_db = SessionLocal()
             try:
                 execution_result = execution_service.execute_indicator(indicator_db, indicator.id)
@@ -168,32 +206,90 @@ def generate_report(
 @router.get("/{report_id}/export")
 def export_report(
     report_id: int,
-    format: str = Query("json", regex="^(json|csv|excel)$", description="Format d'export: json, csv ou excel"),
+    format: str = Query("json", regex="^(json|csv|excel|parquet|arrow)$", description="Format d'export: json, csv, excel, parquet ou arrow"),
+    compression: Optional[str] = Query(None, regex="^(gzip|zstd)$", description="Compression à la volée: gzip ou zstd"),
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     Exporte un rapport dans différents formats.
+    parquet / arrow: archive ZIP avec un fichier par indicateur (nécessite pyarrow).
+    compression=gzip|zstd: Content-Encoding si le client l'accepte, sinon fichier .gz / .zst.
+    ETag calculé à partir du rapport, de ses indicateurs et des versions des tables:
+    If-None-Match -> 304 sans réexécuter les indicateurs, exports récents servis depuis le cache disque.
     Accessible à tous les utilisateurs authentifiés.
     """
     report = service.get_report(db, report_id)
     
-    # Générer le rapport
     indicators_with_config = report_dao.get_indicators_with_config(db, report_id)
-    
-    results = []
+
+    if format in ("parquet", "arrow"):
+        # dépendance vérifiée avant l'ETag: jamais de 304 pour un export impossible
+        columnar_service.check_format(format)
+
+    media_type, filename = _EXPORT_FILES[format]
+    filename = filename.format(id=report.id)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compression:
+        media_type, headers = compressed_response_meta(compression, accept_encoding, filename, media_type)
+
+    # Les indicateurs peuvent lire n'importe quelle table de données
+    versions = version_dao.get_versions(db, metadata_dao.get_tables())
+    etag = make_etag(
+        "report", report.id, report.updated_at,
+        [
+            (item['indicator'].id, item['indicator'].updated_at, item['chart_type'], item['display_order'])
+            for item in indicators_with_config
+        ],
+        versions, format, compression, headers.get("Content-Encoding"),
+    )
+
+    failures = []
+
+    def _produce():
+        if format == "excel":
+            # classeur write_only écrit feuille par feuille sur disque, puis envoyé par morceaux
+            path = write_report_xlsx(_iter_indicator_results(db, indicators_with_config, failures))
+            chunks = iter_temp_file(path)
+        else:
+            chunks = iter_bytes(_build_export_content(db, report, indicators_with_config, format, failures))
+        if compression:
+            return compress_stream(chunks, compression)
+        return chunks
+
+    # un export contenant un indicateur en erreur n'est pas mis en cache
+    return cached_export_response(
+        etag, if_none_match, media_type, headers, _produce,
+        should_cache=lambda: not failures,
+    )
+
+
+def _iter_indicator_results(db: Session, indicators_with_config, failures: list):
+    """
+    Exécute les indicateurs du rapport un par un et produit leurs résultats au fur et à mesure.
+    Les ids des indicateurs en erreur sont ajoutés à failures.
+    """
+    try:
+        fused_results = execution_service.execute_fused(db, [item['indicator'] for item in indicators_with_config])
+    except Exception:
+        # optimisation seulement: en cas d'échec, chaque indicateur est exécuté seul
+        db.rollback()
+        fused_results = {}
     for item in indicators_with_config:
         indicator = item['indicator']
         try:
-            execution_result = execution_service.execute_indicator(db, indicator.id)
-            results.append({
+            execution_result = fused_results.get(indicator.id) or execution_service.execute_indicator(db, indicator.id)
+            yield {
                 "indicator_id": indicator.id,
                 "indicator_title": indicator.title,
                 "chart_type": item['chart_type'],
                 "execution_result": execution_result
-            })
+            }
         except Exception as e:
-            results.append({
+            failures.append(indicator.id)
+            yield {
                 "indicator_id": indicator.id,
                 "indicator_title": indicator.title,
                 "chart_type": item['chart_type'],
@@ -203,8 +299,13 @@ def export_report(
                     "columns": [],
                     "row_count": 0
                 }
-            })
-    
+            }
+
+
+def _build_export_content(db: Session, report, indicators_with_config, format: str, failures: list):
+    """Exécute les indicateurs du rapport et produit le contenu de l'export (str ou bytes)."""
+    results = list(_iter_indicator_results(db, indicators_with_config, failures))
+
     if format == "json":
         # Export JSON
         export_data = {
@@ -213,13 +314,7 @@ def export_report(
             "generated_at": datetime.now().isoformat(),
             "results": results
         }
-        return Response(
-            content=json.dumps(export_data, indent=2, ensure_ascii=False),
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f'attachment; filename="report_{report.id}.json"'
-            }
-        )
+        return json.dumps(export_data, indent=2, ensure_ascii=False)
     
     elif format == "csv":
         # Export CSV (tous les résultats concaténés)
@@ -246,64 +341,11 @@ def export_report(
         csv_text = sio.getvalue()
         csv_text = "\ufeff" + csv_text  # BOM UTF-8 pour Excel
         
-        return Response(
-            content=csv_text,
-            media_type="text/csv; charset=utf-8",
-            headers={
-                "Content-Disposition": f'attachment; filename="report_{report.id}.csv"'
-            }
-        )
-    
-    elif format == "excel":
-        # Export Excel (nécessite openpyxl)
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill
-            
-            wb = Workbook()
-            wb.remove(wb.active)  # Supprimer la feuille par défaut
-            
-            for result in results:
-                if result['execution_result'].get('error'):
-                    continue
-                
-                exec_result = result['execution_result']
-                ws = wb.create_sheet(title=result['indicator_title'][:31])  # Limite Excel
-                
-                # Titre
-                ws['A1'] = result['indicator_title']
-                ws['A1'].font = Font(bold=True, size=14)
-                
-                # En-têtes
-                for col_idx, col_name in enumerate(exec_result['columns'], start=1):
-                    cell = ws.cell(row=3, column=col_idx, value=col_name)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="E0E7FF", end_color="E0E7FF", fill_type="solid")
-                
-                # Données
-                for row_idx, row in enumerate(exec_result['rows'], start=4):
-                    for col_idx, col_name in enumerate(exec_result['columns'], start=1):
-                        ws.cell(row=row_idx, column=col_idx, value=row.get(col_name, ''))
-            
-            # Sauvegarder dans un buffer
-            from io import BytesIO
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-            
-            return Response(
-                content=buffer.getvalue(),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f'attachment; filename="report_{report.id}.xlsx"'
-                }
-            )
-        except ImportError:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Export Excel non disponible. Installez openpyxl: pip install openpyxl"
-            )
+        return csv_text
     
+    elif format in ("parquet", "arrow"):
+        return columnar_service.build_report_archive(results, file_format=format)
+
     raise HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
         detail=f"Format d'export non supporté: {format}"
@@ -0,0 +1,274 @@
+"""
+Benchmark du chemin d'import CSV (CsvImportService.import_stream).
+
+Génère des CSV synthétiques à partir de la nomenclature (MetadataDao.get_columns)
+et des types des modèles SQLAlchemy, les importe dans la base configurée
+(DATABASE_URL, base locale de préférence) puis affiche pour chaque taille :
+lignes/s, pic de mémoire (RSS) et allers-retours base pour 1000 lignes.
+
+Chaque scénario tourne dans un processus séparé pour que le pic RSS mesuré
+soit celui de l'import seul. Les lignes insérées (PK préfixées par "bench")
+sont supprimées à la fin de chaque scénario, sauf avec --keep-rows.
+
+Exemples:
+    python -m app.benchmarks.import_benchmark
+    python -m app.benchmarks.import_benchmark --tables etudiants --sizes 1000 10000 --mode bulk
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+from queue import Empty
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, String, event, text
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PK_PREFIX = "bench"
+# attente des mesures par tranches: un processus enfant mort ne bloque pas le benchmark
+_QUEUE_POLL_SECONDS = 5
+
+# Valeurs courtes réalistes (faible cardinalité, comme les vraies exportations)
+_SHORT_VALUES = ["O", "N", "M", "F", "oui", "non", "France", "Lyon", "INFO", "MECA", "GEN", "BAC S"]
+_WORDS = [
+    "ingénieur", "formation", "entreprise", "stage", "emploi", "recherche", "contrat",
+    "international", "mobilité", "secteur", "industrie", "informatique", "mécanique",
+]
+
+
+def _column_generators(table: str, columns: List[str], pk_field: str, seed: int):
+    """Un générateur de valeur par colonne, déduit du type de la colonne du modèle."""
+    from app.services.csv_import_service import CsvImportService
+
+    model = CsvImportService()._model_by_table[table]
+    model_cols = {c.name: c for c in model.__table__.columns}
+    rnd = random.Random(seed)
+
+    def _gen_for(col_name: str):
+        if col_name == pk_field:
+            # pas de '_' ni de 'inter' : la PK mobilite est normalisée à l'import
+            return lambda i: f"{PK_PREFIX}{i:09d}"
+
+        col = model_cols.get(col_name)
+        col_type = col.type if col is not None else None
+
+        if isinstance(col_type, Integer):
+            return lambda i: str(rnd.randint(0, 2030))
+
+        max_len = getattr(col_type, "length", None) if isinstance(col_type, String) else None
+        if max_len is not None and max_len <= 16:
+            pool = [v for v in _SHORT_VALUES if len(v) <= max_len]
+            return lambda i: rnd.choice(pool)
+
+        limit = max_len or 200
+        # ~10% de cellules vides, comme dans les fichiers réels
+        def _text(i: int) -> str:
+            if rnd.random() < 0.1:
+                return ""
+            return " ".join(rnd.choices(_WORDS, k=rnd.randint(1, 6)))[:limit]
+
+        return _text
+
+    return [_gen_for(c) for c in columns]
+
+
+def generate_csv(table: str, rows: int, path: str, seed: int = 42) -> int:
+    """Écrit un CSV synthétique de `rows` lignes (délimiteur ';'). Retourne sa taille en octets."""
+    from app.dao.metadata_dao import MetadataDao
+    from app.services.csv_import_service import CsvImportService
+
+    columns = MetadataDao().get_columns(table)
+    pk_field, _ = CsvImportService()._get_pk_and_dao(table)
+    generators = _column_generators(table, columns, pk_field, seed)
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";", lineterminator="\n")
+        writer.writerow(columns)
+        for i in range(rows):
+            writer.writerow([gen(i) for gen in generators])
+    return os.path.getsize(path)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _cleanup_rows(table: str) -> None:
+    from app.core.database import SessionLocal
+    from app.services.csv_import_service import CsvImportService
+
+    pk_field, dao = CsvImportService()._get_pk_and_dao(table)
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            text(f'DELETE FROM "{table}" WHERE "{pk_field}" LIKE :prefix'),
+            {"prefix": f"{PK_PREFIX}%"},
+        )
+        if result.rowcount:
+            # même transaction: les caches indexés sur la version (exports, comptages,
+            # indicateurs) ne servent plus de données contenant les lignes supprimées
+            dao.versions.bump(db, table)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_scenario(table: str, path: str, mode: str, batch_size: Optional[int], queue) -> None:
+    """Exécuté dans un processus enfant: importe le fichier et renvoie les mesures."""
+    from app.core.database import SessionLocal, engine
+    from app.services.csv_import_service import CsvImportService
+
+    # Un aller-retour = une requête exécutée ou un COMMIT
+    # (le COPY du mode bulk passe par le curseur brut: compté comme une requête)
+    counters = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        counters["statements"] += 1
+
+    @event.listens_for(engine, "commit")
+    def _count_commit(conn):
+        counters["commits"] += 1
+
+    service = CsvImportService()
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as raw:
+            # le schéma est lu hors mesure (cache process-wide)
+            service._get_pk_and_dao(table)[1]._get_existing_columns(db)
+            db.commit()
+            counters["statements"] = counters["commits"] = 0
+
+            start = time.perf_counter()
+            result = service.import_stream(db, table, raw, mode=mode, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+        if mode == "bulk":
+            counters["statements"] += 1
+        queue.put({
+            "elapsed": elapsed,
+            "result": result,
+            "round_trips": counters["statements"] + counters["commits"],
+            "peak_rss_mb": _peak_rss_mb(),
+        })
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {getattr(e, 'detail', e)}"})
+    finally:
+        db.close()
+
+
+def _wait_measure(proc, queue) -> Dict[str, Any]:
+    """Mesures du processus enfant, ou une erreur s'il s'est arrêté sans en envoyer."""
+    while True:
+        try:
+            return queue.get(timeout=_QUEUE_POLL_SECONDS)
+        except Empty:
+            if not proc.is_alive():
+                # dernier essai: le message a pu arriver juste avant la fin du processus
+                try:
+                    return queue.get(timeout=_QUEUE_POLL_SECONDS)
+                except Empty:
+                    return {"error": f"processus arrêté sans résultat (exitcode={proc.exitcode})"}
+
+
+def run_benchmark(
+    tables: List[str],
+    sizes: List[int],
+    mode: str = "batch",
+    batch_size: Optional[int] = None,
+    keep_rows: bool = False,
+    workdir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    ctx = multiprocessing.get_context("spawn")
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory(prefix="import_bench_", dir=workdir) as tmpdir:
+        for table in tables:
+            for size in sizes:
+                path = os.path.join(tmpdir, f"{table}_{size}.csv")
+                print(f"⏳ {table} / {size} lignes: génération...", flush=True)
+                file_bytes = generate_csv(table, size, path)
+
+                _cleanup_rows(table)
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_scenario, args=(table, path, mode, batch_size, queue))
+                proc.start()
+                measure = _wait_measure(proc, queue)
+                proc.join()
+                os.remove(path)
+                if not keep_rows:
+                    _cleanup_rows(table)
+
+                if "error" in measure:
+                    print(f"❌ {table} / {size}: {measure['error']}")
+                    continue
+
+                elapsed = measure["elapsed"]
+                row = {
+                    "table": table,
+                    "rows": size,
+                    "mode": mode,
+                    "file_mb": file_bytes / (1024 * 1024),
+                    "seconds": elapsed,
+                    "rows_per_second": size / elapsed if elapsed > 0 else 0.0,
+                    "peak_rss_mb": measure["peak_rss_mb"],
+                    "round_trips_per_1k": measure["round_trips"] * 1000 / size,
+                    "errors": measure["result"].get("error_count", 0),
+                }
+                results.append(row)
+                print(
+                    f"✅ {table} / {size}: {row['rows_per_second']:.0f} lignes/s, "
+                    f"pic RSS {row['peak_rss_mb']:.0f} Mo, "
+                    f"{row['round_trips_per_1k']:.1f} allers-retours / 1k lignes",
+                    flush=True,
+                )
+    return results
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    header = f"{'table':<10} {'lignes':>9} {'mode':<6} {'CSV Mo':>7} {'durée s':>8} {'lignes/s':>9} {'RSS Mo':>7} {'AR/1k':>7} {'erreurs':>7}"
+    print()
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['table']:<10} {r['rows']:>9} {r['mode']:<6} {r['file_mb']:>7.1f} {r['seconds']:>8.2f} "
+            f"{r['rows_per_second']:>9.0f} {r['peak_rss_mb']:>7.0f} {r['round_trips_per_1k']:>7.1f} {r['errors']:>7}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.dao.metadata_dao import MetadataDao
+
+    tables = MetadataDao().get_tables()
+    parser = argparse.ArgumentParser(description="Benchmark du débit d'import CSV")
+    parser.add_argument("--tables", nargs="+", choices=tables, default=tables)
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--mode", choices=["batch", "row", "bulk"], default="batch")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--keep-rows", action="store_true", help="Ne pas supprimer les lignes importées")
+    parser.add_argument("--workdir", default=None, help="Dossier des CSV générés (défaut: tmp système)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        args.tables,
+        args.sizes,
+        mode=args.mode,
+        batch_size=args.batch_size,
+        keep_rows=args.keep_rows,
+        workdir=args.workdir,
+    )
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
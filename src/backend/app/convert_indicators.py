@@ -18,7 +18,10 @@ Format attendu:
 
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
+from app.dao.indicator_dao import IndicatorDao
 from app.models.indicator import Indicator
+from app.services.materialized_indicator_service import MaterializedIndicatorService
+from app.utils.sql_translator import compile_indicator
 
 
 def convert_indicator(old_format: dict, title: str) -> dict:
@@ -179,7 +182,10 @@ def convert_all_indicators():
             try:
                 new_format = convert_indicator(old_format, indicator.title)
                 indicator.indicator = new_format
-                db.commit()
+                # compilation enregistrée alignée sur le nouveau JSON
+                IndicatorDao().save_compilation(db, indicator, compile_indicator(new_format))
+                if indicator.materialized:
+                    MaterializedIndicatorService().build(db, indicator)
                 print(f"✅ {indicator.title} (ID: {indicator.id}) - Converti avec succès")
                 print(f"   Table: {new_format['sujet']['tables'][0]}")
                 print(f"   Colonnes: {len(new_format['colonnes'])}")
@@ -15,7 +15,34 @@ class Settings(BaseSettings):
     
     # CORS (peut être une liste ou une chaîne séparée par des virgules)
     CORS_ORIGINS: str | list[str] = "http://localhost:5173,http://localhost:3000"
-    
+
+    # Import CSV : nombre de lignes envoyées par requête INSERT multi-VALUES
+    IMPORT_BATCH_SIZE: int = 1000
+
+    # Jobs d'import en arrière-plan
+    IMPORT_JOB_WORKERS: int = 2
+    IMPORT_JOB_HISTORY: int = 50  # nombre de jobs terminés conservés en mémoire
+
+    # Import groupé: processus de lecture/validation des fichiers en parallèle
+    IMPORT_BUNDLE_WORKERS: int = 3
+
+    # Export CSV en flux: lignes lues par aller-retour du curseur côté serveur
+    EXPORT_FETCH_SIZE: int = 2000
+
+    # Cache disque des exports (clé = ETag): dossier (défaut: tmp système) et taille max
+    EXPORT_CACHE_DIR: Optional[str] = None
+    EXPORT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 0 = cache désactivé
+
+    # Navigateur de tables: nombre de COUNT(*) gardés en cache (count=cached)
+    COUNT_CACHE_SIZE: int = 1024
+
+    # Cache des résultats d'indicateurs (invalidé par les versions de tables)
+    INDICATOR_CACHE_MAX_ENTRIES: int = 512
+    INDICATOR_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 0 = cache désactivé
+
+    # Requêtes d'indicateurs préparées (PREPARE) gardées par connexion
+    PREPARED_STATEMENTS_MAX: int = 200
+
     class Config:
         env_file = ".env"
         case_sensitive = True
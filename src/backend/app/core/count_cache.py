@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+
+class CountCache:
+    """
+    Cache process-wide des COUNT(*) exacts du navigateur de tables, par
+    (table, version de la table, WHERE, paramètres). La version change à chaque
+    import / suppression: les comptes périmés ne sont plus jamais lus et sortent par LRU.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.COUNT_CACHE_SIZE
+        self._entries: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(table: str, version: int, where_clause: str, params: Dict[str, Any]) -> Tuple:
+        return (table, version, where_clause, tuple(sorted((k, repr(v)) for k, v in params.items())))
+
+    def get(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            total = self._entries.get(key)
+            if total is not None:
+                self._entries.move_to_end(key)
+            return total
+
+    def put(self, key: Hashable, total: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = total
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache()
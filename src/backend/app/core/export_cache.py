@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import uuid
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from app.core.config import settings
+
+
+class ExportCache:
+    """
+    Cache disque process-wide des exports déjà produits (CSV, Parquet, rapports...).
+    Un fichier par clé (dérivée de l'ETag), taille totale bornée, éviction LRU
+    (la date de modification sert de date de dernier accès).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.EXPORT_CACHE_DIR or os.path.join(
+            tempfile.gettempdir(), "polytech_export_cache"
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else settings.EXPORT_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Fichier en cache ouvert en lecture (None si absent). Le fichier est ouvert tout
+        de suite: une éviction concurrente ne coupe pas une réponse en cours.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # LRU: dernier accès
+        except OSError:
+            pass
+        return handle
+
+    def store_stream(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Renvoie les morceaux tels quels tout en les écrivant sur disque.
+        L'entrée n'est publiée (rename atomique) que si le flux va jusqu'au bout.
+        """
+        if not self.enabled:
+            yield from chunks
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(f".{key}.{uuid.uuid4().hex}.tmp")
+        complete = False
+        try:
+            with open(tmp_path, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                os.replace(tmp_path, self._path(key))
+                self._evict()
+            else:
+                # client déconnecté ou erreur: pas d'entrée partielle
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def put(self, key: str, data: bytes) -> None:
+        """Ajoute un export déjà en mémoire (ex: rapport)."""
+        for _ in self.store_stream(key, [data]):
+            pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            entries.sort()  # plus anciens accès d'abord
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            for entry in os.scandir(self.directory):
+                if entry.is_file():
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+
+export_cache = ExportCache()
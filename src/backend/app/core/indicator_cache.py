@@ -0,0 +1,96 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+def spec_hash(spec: Dict[str, Any]) -> str:
+    """Empreinte canonique (sha256) d'un indicateur JSON: indépendante de l'ordre des clés."""
+    canonical = json.dumps(spec, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IndicatorResultCache:
+    """
+    Cache process-wide des résultats d'indicateurs (sql, colonnes, lignes).
+    Clé = empreinte de l'indicateur + versions des tables qu'il lit: un import ou une
+    suppression change la version, l'ancien résultat n'est plus jamais lu et sort par LRU.
+    Borné en nombre d'entrées et en taille (taille JSON approximative des lignes).
+    Les résultats sont copiés à l'entrée et à la sortie: un appelant qui modifie
+    ses lignes (mise en forme d'un export...) ne modifie pas l'entrée du cache.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.INDICATOR_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else settings.INDICATOR_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(spec_digest: str, versions: Dict[str, int]) -> str:
+        """spec_digest: spec_hash() de l'indicateur ; versions: {table: version} des tables lues."""
+        tables = ",".join(f"{table}:{versions[table]}" for table in sorted(versions))
+        return f"{spec_digest}|{tables}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            result = entry[0]
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        size = len(json.dumps(result, default=str, ensure_ascii=False))
+        if size > self.max_bytes:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (result, size)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+indicator_cache = IndicatorResultCache()
@@ -0,0 +1,59 @@
+import threading
+from typing import Dict, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class SchemaCatalog:
+    """
+    Catalogue process-wide des colonnes réelles (nom -> type PostgreSQL) des tables.
+    Chaque table est lue une seule fois dans information_schema puis gardée en cache.
+    Le cache doit être invalidé explicitement après une DDL / migration (invalidate()).
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def get_column_types(self, db: Session, table: str) -> Dict[str, str]:
+        """Colonnes existantes de la table, dans l'ordre de la table: {nom: data_type}."""
+        cached = self._columns.get(table)
+        if cached is not None:
+            return cached
+
+        result = db.execute(
+            text("""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_name = :table_name
+                  AND table_schema = current_schema()
+                ORDER BY ordinal_position
+            """),
+            {"table_name": table},
+        )
+        columns = {row[0]: row[1] for row in result.fetchall()}
+
+        # Une table absente (pas encore créée) n'est pas mise en cache
+        if columns:
+            with self._lock:
+                self._columns[table] = columns
+        return columns
+
+    def get_columns(self, db: Session, table: str) -> Set[str]:
+        """Noms des colonnes qui existent réellement dans la table."""
+        return set(self.get_column_types(db, table))
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """Oublie une table (ou tout le catalogue) : relu au prochain accès."""
+        with self._lock:
+            if table is None:
+                self._columns.clear()
+            else:
+                self._columns.pop(table, None)
+
+    def cached_tables(self) -> list[str]:
+        return sorted(self._columns.keys())
+
+
+schema_catalog = SchemaCatalog()
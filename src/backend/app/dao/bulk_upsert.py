@@ -0,0 +1,193 @@
+# app/dao/bulk_upsert.py
+
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.utils.search_document import SEARCH_DOCUMENT_COLUMN
+
+
+# Colonne d'empreinte: si elle existe, une ligne dont l'empreinte n'a pas changé n'est pas réécrite
+ROW_HASH_COLUMN = "row_hash"
+
+# Colonnes techniques des tables de données (hors nomenclature): jamais renvoyées
+TECHNICAL_COLUMNS = (ROW_HASH_COLUMN, SEARCH_DOCUMENT_COLUMN)
+
+
+def upsert_rows(
+    db: Session,
+    table_name: str,
+    pk_field: str,
+    payloads: List[Dict[str, Any]],
+    existing_cols: Iterable[str],
+) -> Dict[str, int]:
+    """
+    UPSERT multi-lignes : un seul INSERT ... VALUES (...), (...) ON CONFLICT (pk) DO UPDATE.
+    - les colonnes absentes de la table réelle sont ignorées (comme pour l'upsert unitaire)
+    - si row_hash est présent, l'UPDATE n'a lieu que si l'empreinte a changé
+    - ne commit pas : la transaction est gérée par l'appelant
+    Retourne {"inserted": n, "updated": n} (les lignes inchangées ne sont pas comptées).
+    """
+    if not payloads:
+        return {"inserted": 0, "updated": 0}
+
+    for payload in payloads:
+        if not payload.get(pk_field):
+            raise ValueError(f"Missing required primary key field: {pk_field}")
+
+    existing = set(existing_cols)
+    columns = [col for col in payloads[0].keys() if col in existing]
+    if pk_field not in columns:
+        raise ValueError("Aucune colonne valide dans le payload")
+
+    # Table "légère" : seulement les colonnes réellement présentes en base
+    target = table(table_name, *[column(col) for col in columns])
+    rows = [{col: payload.get(col) for col in columns} for payload in payloads]
+
+    stmt = insert(target).values(rows)
+    update_cols = [col for col in columns if col != pk_field]
+    if update_cols:
+        where = None
+        if ROW_HASH_COLUMN in columns:
+            where = target.c[ROW_HASH_COLUMN].is_distinct_from(stmt.excluded[ROW_HASH_COLUMN])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[pk_field],
+            set_={col: stmt.excluded[col] for col in update_cols},
+            where=where,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[pk_field])
+
+    # xmax = 0 <=> ligne nouvellement insérée (sinon mise à jour)
+    stmt = stmt.returning(literal_column("(xmax = 0)").label("inserted"))
+    flags = [row[0] for row in db.execute(stmt)]
+    inserted = sum(1 for flag in flags if flag)
+    return {"inserted": inserted, "updated": len(flags) - inserted}
+
+
+class _CsvRowStream:
+    """
+    Pseudo-fichier texte alimenté par un itérateur de lignes, lu par
+    cursor.copy_expert() : les lignes sont sérialisées en CSV à la demande,
+    sans jamais matérialiser le fichier complet.
+    Une exception levée par l'itérateur (annulation, fichier invalide) ne doit pas
+    traverser copy_expert (psycopg2 la transformerait en erreur COPY) : elle est
+    gardée dans error, le flux se termine, et l'appelant la relève après le COPY.
+    """
+
+    def __init__(self, rows: Iterator[List[Any]]):
+        self._rows = rows
+        self.error: Optional[BaseException] = None
+        self._sio = io.StringIO()
+        self._writer = csv.writer(self._sio, lineterminator="\n")
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            except Exception as e:
+                self.error = e
+                break
+            self._sio.seek(0)
+            self._sio.truncate(0)
+            # None -> champ vide non quoté -> NULL pour COPY (FORMAT csv)
+            self._writer.writerow(row)
+            line = self._sio.getvalue()
+            chunks.append(line)
+            length += len(line)
+
+        data = "".join(chunks)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+    readline = read
+
+
+def copy_merge_rows(
+    db: Session,
+    table_name: str,
+    pk_field: str,
+    columns: List[str],
+    rows: Iterable[Tuple[int, Dict[str, Any]]],
+) -> Dict[str, int]:
+    """
+    Chargement massif en deux temps:
+    1. COPY FROM STDIN vers une table de staging temporaire (même structure que la cible)
+    2. un seul INSERT INTO cible SELECT ... FROM staging ON CONFLICT (pk) DO UPDATE
+       (seulement pour les lignes dont row_hash a changé, si la colonne existe)
+
+    rows: itérable de (numéro de ligne, payload). Si une PK apparaît plusieurs fois,
+    la dernière ligne du fichier l'emporte (comme avec l'upsert ligne par ligne).
+    Ne commit pas : la transaction est gérée par l'appelant.
+    Retourne {"inserted": n, "updated": n}.
+    """
+    if pk_field not in columns:
+        raise ValueError(f"Missing required primary key field: {pk_field}")
+
+    staging = f"_staging_{table_name}"
+    cols_sql = ", ".join(f'"{col}"' for col in columns)
+
+    db.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    db.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    db.execute(text(f"ALTER TABLE {staging} ADD COLUMN _import_line integer"))
+
+    csv_rows = ([payload.get(col) for col in columns] + [line] for line, payload in rows)
+
+    stream = _CsvRowStream(csv_rows)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {staging} ({cols_sql}, _import_line) FROM STDIN WITH (FORMAT csv)",
+            stream,
+        )
+    except Exception:
+        if stream.error is not None:
+            raise stream.error from None
+        raise
+    finally:
+        cursor.close()
+    if stream.error is not None:
+        # l'erreur d'origine (ex: ImportCancelled), pas une erreur COPY
+        raise stream.error
+
+    update_cols = [col for col in columns if col != pk_field]
+    if update_cols:
+        update_clause = ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in update_cols)
+        conflict_clause = f'ON CONFLICT ("{pk_field}") DO UPDATE SET {update_clause}'
+        if ROW_HASH_COLUMN in columns:
+            conflict_clause += (
+                f' WHERE {table_name}."{ROW_HASH_COLUMN}" IS DISTINCT FROM EXCLUDED."{ROW_HASH_COLUMN}"'
+            )
+    else:
+        conflict_clause = f'ON CONFLICT ("{pk_field}") DO NOTHING'
+
+    result = db.execute(text(f"""
+        WITH merged AS (
+            INSERT INTO {table_name} ({cols_sql})
+            SELECT DISTINCT ON ("{pk_field}") {cols_sql}
+            FROM {staging}
+            ORDER BY "{pk_field}", _import_line DESC
+            {conflict_clause}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT
+            COUNT(*) FILTER (WHERE inserted) AS inserted,
+            COUNT(*) FILTER (WHERE NOT inserted) AS updated
+        FROM merged
+    """))
+    inserted, updated = result.one()
+
+    db.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    return {"inserted": inserted, "updated": updated}
@@ -3,20 +3,22 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.models.etudiants import Etudiants
-from typing import Any, Dict, List
+from app.core.schema_catalog import schema_catalog
+from app.dao.bulk_upsert import copy_merge_rows, upsert_rows
+from app.dao.table_version_dao import TableVersionDao
+from typing import Any, Dict, Iterable, List, Tuple
 
 class EtudiantsDao:
+    versions = TableVersionDao()
+
     def _get_existing_columns(self, db: Session) -> set:
-        """Récupère les colonnes qui existent réellement dans la table."""
-        from sqlalchemy import text
-        
-        result = db.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'etudiants'
-        """))
-        return {row[0] for row in result.fetchall()}
-    
+        """Récupère les colonnes qui existent réellement dans la table (catalogue en cache)."""
+        return schema_catalog.get_columns(db, "etudiants")
+
+    def normalize_pk(self, value: str) -> str:
+        """Clé primaire telle qu'elle sera stockée (aucune transformation pour cette table)."""
+        return value
+
     def upsert(self, db: Session, payload: dict) -> Etudiants:
         """
         UPSERT PostgreSQL sur la PK: id_polytech
@@ -66,9 +68,31 @@ class EtudiantsDao:
             return Etudiants(**dict(row._mapping))
         raise ValueError("Aucune ligne retournée après l'upsert")
 
+    def upsert_many(self, db: Session, payloads: List[dict]) -> Dict[str, int]:
+        """
+        UPSERT multi-lignes PostgreSQL sur la PK: id_polytech
+        Un seul INSERT ... VALUES (...), (...) ON CONFLICT pour tout le lot.
+        Ne commit pas: la transaction est gérée par l'appelant (import par lots).
+        Retourne {"inserted": n, "updated": n} (lignes à row_hash inchangé non réécrites).
+        """
+        existing_cols = self._get_existing_columns(db)
+        return upsert_rows(db, "etudiants", "id_polytech", payloads, existing_cols)
+
+    def copy_merge(self, db: Session, columns: List[str], rows: Iterable[Tuple[int, dict]]) -> Dict[str, int]:
+        """
+        Chargement massif: COPY FROM STDIN dans une table de staging temporaire,
+        puis un seul INSERT ... SELECT ... ON CONFLICT (id_polytech) DO UPDATE.
+        rows: itérable de (numéro de ligne, payload). Ne commit pas.
+        """
+        existing_cols = self._get_existing_columns(db)
+        columns = [col for col in columns if col in existing_cols]
+        return copy_merge_rows(db, "etudiants", "id_polytech", columns, rows)
+
     def delete(self, db: Session, id_polytech: str) -> bool:
         q = db.query(Etudiants).filter(Etudiants.id_polytech == id_polytech)
         deleted = q.delete(synchronize_session=False)
+        if deleted:
+            self.versions.bump(db, "etudiants")
         db.commit()
         return deleted > 0
 
@@ -1,3 +1,4 @@
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.orm import Session
 from app.models.indicator import Indicator
 
@@ -6,27 +7,66 @@ class IndicatorDao:
     def get_by_id(self, db: Session, indicator_id: int) -> Indicator | None:
         return db.query(Indicator).filter(Indicator.id == indicator_id).first()
 
-    def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> list[Indicator]:
-        return db.query(Indicator).order_by(Indicator.id.desc()).offset(skip).limit(limit).all()
+    def get_all(self, db: Session, skip: int = 0, limit: int = 100, table: str | None = None) -> list[Indicator]:
+        query = db.query(Indicator)
+        if table:
+            # indicateurs qui lisent cette table (referenced_tables @> '["table"]')
+            query = query.filter(Indicator.referenced_tables.contains([table]))
+        return query.order_by(Indicator.id.desc()).offset(skip).limit(limit).all()
 
-    def create(self, db: Session, title: str, description, indicator, created_by: int | None) -> Indicator:
+    def get_materialized(self, db: Session, tables: list[str] | None = None) -> list[Indicator]:
+        """Indicateurs adossés à une vue matérialisée (qui lisent l'une de ces tables, si précisé)."""
+        query = db.query(Indicator).filter(Indicator.materialized.is_(True))
+        if tables:
+            query = query.filter(Indicator.referenced_tables.has_any(array(tables)))
+        return query.order_by(Indicator.id).all()
+
+    def get_stale(self, db: Session, translator_version: int) -> list[Indicator]:
+        """Indicateurs compilés avec une autre version du traducteur (ou jamais compilés)."""
+        return (
+            db.query(Indicator)
+            .filter(Indicator.translator_version.is_distinct_from(translator_version))
+            .order_by(Indicator.id)
+            .all()
+        )
+
+    def create(
+        self, db: Session, title: str, description, indicator, created_by: int | None, commit: bool = True, **compilation
+    ) -> Indicator:
+        """commit=False: flush seulement (id attribué), la transaction est gérée par l'appelant."""
         db_indicator = Indicator(
             title=title,
             description=description,
             indicator=indicator,
-            created_by=created_by
+            created_by=created_by,
+            **compilation
         )
         db.add(db_indicator)
-        db.commit()
-        db.refresh(db_indicator)
+        if commit:
+            db.commit()
+            db.refresh(db_indicator)
+        else:
+            db.flush()
         return db_indicator
 
-    def update(self, db: Session, db_indicator: Indicator, **kwargs) -> Indicator:
+    def update(self, db: Session, db_indicator: Indicator, commit: bool = True, **kwargs) -> Indicator:
         for key, value in kwargs.items():
             if value is not None:
                 setattr(db_indicator, key, value)
-        db.commit()
-        db.refresh(db_indicator)
+        if commit:
+            db.commit()
+            db.refresh(db_indicator)
+        else:
+            db.flush()
+        return db_indicator
+
+    def save_compilation(self, db: Session, db_indicator: Indicator, compilation: dict, commit: bool = True) -> Indicator:
+        """Enregistre la compilation (les valeurs None sont écrites, contrairement à update)."""
+        for key, value in compilation.items():
+            setattr(db_indicator, key, value)
+        if commit:
+            db.commit()
+            db.refresh(db_indicator)
         return db_indicator
 
     def delete(self, db: Session, db_indicator: Indicator) -> None:
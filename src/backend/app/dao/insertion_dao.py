@@ -3,22 +3,22 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.models.insertion import Insertion
-from typing import Any, Dict, List
+from app.core.schema_catalog import schema_catalog
+from app.dao.bulk_upsert import copy_merge_rows, upsert_rows
+from app.dao.table_version_dao import TableVersionDao
+from typing import Any, Dict, Iterable, List, Tuple
 
 class InsertionDao:
+    versions = TableVersionDao()
+
     def _get_existing_columns(self, db: Session) -> set:
-        """Récupère les colonnes qui existent réellement dans la table."""
-        from sqlalchemy import text, inspect
-        from app.core.database import engine
-        
-        # Utiliser information_schema pour obtenir les colonnes réelles
-        result = db.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'insertion'
-        """))
-        return {row[0] for row in result.fetchall()}
-    
+        """Récupère les colonnes qui existent réellement dans la table (catalogue en cache)."""
+        return schema_catalog.get_columns(db, "insertion")
+
+    def normalize_pk(self, value: str) -> str:
+        """Clé primaire telle qu'elle sera stockée (aucune transformation pour cette table)."""
+        return value
+
     def upsert(self, db: Session, payload: dict) -> Insertion:
         """
         UPSERT PostgreSQL sur la PK: code
@@ -68,9 +68,31 @@ class InsertionDao:
             return Insertion(**dict(row._mapping))
         raise ValueError("Aucune ligne retournée après l'upsert")
 
+    def upsert_many(self, db: Session, payloads: List[dict]) -> Dict[str, int]:
+        """
+        UPSERT multi-lignes PostgreSQL sur la PK: code
+        Un seul INSERT ... VALUES (...), (...) ON CONFLICT pour tout le lot.
+        Ne commit pas: la transaction est gérée par l'appelant (import par lots).
+        Retourne {"inserted": n, "updated": n} (lignes à row_hash inchangé non réécrites).
+        """
+        existing_cols = self._get_existing_columns(db)
+        return upsert_rows(db, "insertion", "code", payloads, existing_cols)
+
+    def copy_merge(self, db: Session, columns: List[str], rows: Iterable[Tuple[int, dict]]) -> Dict[str, int]:
+        """
+        Chargement massif: COPY FROM STDIN dans une table de staging temporaire,
+        puis un seul INSERT ... SELECT ... ON CONFLICT (code) DO UPDATE.
+        rows: itérable de (numéro de ligne, payload). Ne commit pas.
+        """
+        existing_cols = self._get_existing_columns(db)
+        columns = [col for col in columns if col in existing_cols]
+        return copy_merge_rows(db, "insertion", "code", columns, rows)
+
     def delete(self, db: Session, code: str) -> bool:
         q = db.query(Insertion).filter(Insertion.code == code)
         deleted = q.delete(synchronize_session=False)
+        if deleted:
+            self.versions.bump(db, "insertion")
         db.commit()
         return deleted > 0
 
@@ -88,4 +110,3 @@ class InsertionDao:
         
         # Convertir les Row en dictionnaires
         return [dict(zip(columns, row)) for row in rows]
-
@@ -0,0 +1,53 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Colonne technique des vues: clé unique exigée par REFRESH ... CONCURRENTLY
+ROW_KEY_COLUMN = "_mv_row"
+
+
+def view_name(indicator_id: int) -> str:
+    return f"mv_indicator_{int(indicator_id)}"
+
+
+class MaterializedViewDao:
+    """Vues matérialisées des indicateurs (mv_indicator_{id}). Ne commit pas."""
+
+    def _execute_ddl(self, db: Session, sql: str) -> None:
+        # SQL sans paramètres: envoyé tel quel (pas d'interprétation de ':' ou '%')
+        db.connection().exec_driver_sql(sql, execution_options={"no_parameters": True})
+
+    def create(self, db: Session, indicator_id: int, sql: str, order_by: Optional[List[str]] = None) -> None:
+        """
+        (Re)crée la vue à partir du SQL de l'indicateur (littéraux inlinés),
+        avec un numéro de ligne et son index unique pour les rafraîchissements concurrents.
+        order_by: colonnes de sortie qui ordonnent le résultat de la requête ; les lignes
+        sont numérotées dans cet ordre (l'ordre d'une sous-requête n'est pas garanti).
+        """
+        name = view_name(indicator_id)
+        body = sql.strip().rstrip(";")
+        window = ", ".join('q."{}"'.format(col.replace('"', '""')) for col in order_by or [])
+        over = f"ORDER BY {window}" if window else ""
+        self._execute_ddl(db, f"DROP MATERIALIZED VIEW IF EXISTS {name}")
+        self._execute_ddl(
+            db,
+            f"CREATE MATERIALIZED VIEW {name} AS "
+            f"SELECT row_number() OVER ({over}) AS {ROW_KEY_COLUMN}, q.* FROM ({body}) q",
+        )
+        self._execute_ddl(db, f"CREATE UNIQUE INDEX {name}_row_key ON {name} ({ROW_KEY_COLUMN})")
+
+    def drop(self, db: Session, indicator_id: int) -> None:
+        self._execute_ddl(db, f"DROP MATERIALIZED VIEW IF EXISTS {view_name(indicator_id)}")
+
+    def refresh(self, db: Session, indicator_id: int) -> None:
+        """Rafraîchit la vue sans bloquer ses lecteurs."""
+        self._execute_ddl(db, f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name(indicator_id)}")
+
+    def read(self, db: Session, indicator_id: int) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """(colonnes, lignes) de la vue, dans l'ordre de la requête de l'indicateur."""
+        name = view_name(indicator_id)
+        result = db.execute(text(f"SELECT * FROM {name} ORDER BY {ROW_KEY_COLUMN}"))
+        columns = [col for col in result.keys() if col != ROW_KEY_COLUMN]
+        rows = [{col: row[col] for col in columns} for row in result.mappings()]
+        return columns, rows
@@ -151,6 +151,14 @@ class MetadataDao:
         }
         return columns.get(table, [])
 
+    def get_primary_key(self, table: str) -> str | None:
+        primary_keys: dict[str, str] = {
+            "insertion": "code",
+            "etudiants": "id_polytech",
+            "mobilite": "id_polytech",
+        }
+        return primary_keys.get(table)
+
     def get_columns_for_tables(self, tables: list[str]) -> list[str]:
         result = set()
         for t in tables:
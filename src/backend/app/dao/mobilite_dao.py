@@ -3,20 +3,29 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.models.mobilite import Mobilite
-from typing import Any, Dict, List
+from app.core.schema_catalog import schema_catalog
+from app.dao.bulk_upsert import copy_merge_rows, upsert_rows
+from app.dao.table_version_dao import TableVersionDao
+from typing import Any, Dict, Iterable, List, Tuple
 
 class MobiliteDao:
+    versions = TableVersionDao()
+
     def _get_existing_columns(self, db: Session) -> set:
-        """Récupère les colonnes qui existent réellement dans la table."""
-        from sqlalchemy import text
-        
-        result = db.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'mobilite'
-        """))
-        return {row[0] for row in result.fetchall()}
-    
+        """Récupère les colonnes qui existent réellement dans la table (catalogue en cache)."""
+        return schema_catalog.get_columns(db, "mobilite")
+
+    def _normalize_id_polytech(self, id_polytech: str) -> str:
+        """Aligne l'id_polytech de mobilite sur celui de etudiants."""
+        return id_polytech.replace("_", "").replace("inter", "ing")
+
+    def normalize_pk(self, value: str) -> str:
+        """
+        Clé primaire telle qu'elle sera stockée (id_polytech normalisé, idempotent).
+        Point unique de normalisation: upserts du DAO et import (empreinte, document de recherche).
+        """
+        return self._normalize_id_polytech(value)
+
     def upsert(self, db: Session, payload: dict) -> Mobilite:
         """
         UPSERT PostgreSQL sur la PK: id_polytech
@@ -29,11 +38,7 @@ class MobiliteDao:
             raise ValueError("Missing required primary key field: id_polytech")
         
         # Normalisation id_polytech
-        payload["id_polytech"] = (
-            payload["id_polytech"]
-            .replace("_", "")
-            .replace("inter", "ing")
-        )
+        payload["id_polytech"] = self.normalize_pk(payload["id_polytech"])
 
         # Récupérer les colonnes existantes dans la table
         existing_cols = self._get_existing_columns(db)
@@ -73,9 +78,41 @@ class MobiliteDao:
             return Mobilite(**dict(row._mapping))
         raise ValueError("Aucune ligne retournée après l'upsert")
 
+    def upsert_many(self, db: Session, payloads: List[dict]) -> Dict[str, int]:
+        """
+        UPSERT multi-lignes PostgreSQL sur la PK: id_polytech
+        Un seul INSERT ... VALUES (...), (...) ON CONFLICT pour tout le lot.
+        Ne commit pas: la transaction est gérée par l'appelant (import par lots).
+        Retourne {"inserted": n, "updated": n} (lignes à row_hash inchangé non réécrites).
+        """
+        for payload in payloads:
+            if payload.get("id_polytech"):
+                payload["id_polytech"] = self.normalize_pk(payload["id_polytech"])
+
+        existing_cols = self._get_existing_columns(db)
+        return upsert_rows(db, "mobilite", "id_polytech", payloads, existing_cols)
+
+    def copy_merge(self, db: Session, columns: List[str], rows: Iterable[Tuple[int, dict]]) -> Dict[str, int]:
+        """
+        Chargement massif: COPY FROM STDIN dans une table de staging temporaire,
+        puis un seul INSERT ... SELECT ... ON CONFLICT (id_polytech) DO UPDATE.
+        rows: itérable de (numéro de ligne, payload). Ne commit pas.
+        """
+        existing_cols = self._get_existing_columns(db)
+        columns = [col for col in columns if col in existing_cols]
+
+        def _normalized_rows():
+            for line, payload in rows:
+                payload["id_polytech"] = self.normalize_pk(payload["id_polytech"])
+                yield line, payload
+
+        return copy_merge_rows(db, "mobilite", "id_polytech", columns, _normalized_rows())
+
     def delete(self, db: Session, id_polytech: str) -> bool:
         q = db.query(Mobilite).filter(Mobilite.id_polytech == id_polytech)
         deleted = q.delete(synchronize_session=False)
+        if deleted:
+            self.versions.bump(db, "mobilite")
         db.commit()
         return deleted > 0
     
@@ -93,4 +130,3 @@ class MobiliteDao:
         
         # Convertir les Row en dictionnaires
         return [dict(zip(columns, row)) for row in rows]
-
@@ -0,0 +1,46 @@
+import hashlib
+import re
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Noms des requêtes préparées sur la connexion (connection.info: suit la connexion du pool)
+_INFO_KEY = "prepared_statements"
+
+_PARAM_RE = re.compile(r"(?<![:\w]):(\w+)")
+
+
+def execute_prepared(db: Session, sql: str, params: Dict[str, Any]) -> Result:
+    """
+    Exécute une requête paramétrée (:nom) via PREPARE / EXECUTE: la requête est
+    préparée une fois par connexion et par texte SQL, PostgreSQL réutilise
+    son analyse et (après quelques exécutions) un plan générique.
+    """
+    names = list(params)
+    positions = {name: idx for idx, name in enumerate(names, start=1)}
+
+    def _positional(match: re.Match) -> str:
+        name = match.group(1)
+        return f"${positions[name]}" if name in positions else match.group(0)
+
+    body = _PARAM_RE.sub(_positional, sql.strip().rstrip(";"))
+    statement = "stmt_" + hashlib.sha1(body.encode("utf-8")).hexdigest()[:24]
+
+    connection = db.connection()
+    prepared = connection.info.setdefault(_INFO_KEY, set())
+    if statement not in prepared:
+        if len(prepared) >= settings.PREPARED_STATEMENTS_MAX:
+            # borne la mémoire côté serveur: on repart de zéro
+            connection.execute(text("DEALLOCATE ALL"))
+            prepared.clear()
+        connection.execute(text(f"PREPARE {statement} AS {body}"))
+        prepared.add(statement)
+
+    if not names:
+        return connection.execute(text(f"EXECUTE {statement}"))
+    args = ", ".join(f":{name}" for name in names)
+    return connection.execute(text(f"EXECUTE {statement}({args})"), params)
@@ -0,0 +1,31 @@
+import json
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class RowCountDao:
+    """Nombre de lignes estimé par le planificateur PostgreSQL (sans COUNT(*))."""
+
+    def estimate(self, db: Session, table: str, where_clause: str, params: Dict[str, Any]) -> int:
+        """
+        Estimation sans parcourir la table:
+          - sans filtre: pg_class.reltuples (statistiques du dernier ANALYZE / autovacuum)
+          - avec filtre (ou table jamais analysée): "Plan Rows" de EXPLAIN
+        """
+        if not where_clause:
+            reltuples = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+                {"table_name": table},
+            ).scalar()
+            # -1 (PostgreSQL >= 14) : table jamais analysée
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+
+        plan = db.execute(
+            text(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table}{where_clause}"), params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,29 @@
+from typing import Any, Dict, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def iter_query_rows(
+    db: Session,
+    sql: str,
+    params: Optional[Dict[str, Any]],
+    fetch_size: int,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt le résultat d'une requête via un curseur côté serveur
+    (yield_per -> curseur nommé psycopg2): seules `fetch_size` lignes sont
+    en mémoire à la fois, quelle que soit la taille du résultat.
+    """
+    result = db.execute(
+        text(sql),
+        params or {},
+        execution_options={"yield_per": fetch_size},
+    )
+    try:
+        columns = list(result.keys())
+        for row in result:
+            yield dict(zip(columns, row))
+    finally:
+        result.close()
+
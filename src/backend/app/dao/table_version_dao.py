@@ -0,0 +1,31 @@
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class TableVersionDao:
+    def bump(self, db: Session, table: str) -> None:
+        """
+        Incrémente la version de la table. Ne commit pas: appelé dans la transaction
+        qui modifie les données, la nouvelle version est visible en même temps qu'elles.
+        """
+        db.execute(
+            text("""
+                INSERT INTO table_versions (table_name, version, updated_at)
+                VALUES (:table_name, 1, now())
+                ON CONFLICT (table_name) DO UPDATE
+                SET version = table_versions.version + 1, updated_at = now()
+            """),
+            {"table_name": table},
+        )
+
+    def get_versions(self, db: Session, tables: List[str]) -> Dict[str, int]:
+        """Versions courantes {table: version} (0 pour une table jamais modifiée)."""
+        result = db.execute(
+            text("SELECT table_name, version FROM table_versions WHERE table_name = ANY(:tables)"),
+            {"tables": list(tables)},
+        )
+        versions = {table: 0 for table in tables}
+        versions.update({row[0]: row[1] for row in result.fetchall()})
+        return versions
@@ -0,0 +1,52 @@
+"""
+Script pour ajouter l'option « indicateur matérialisé » (colonnes indicators.materialized
+et materialized_versions)
+et (re)créer les vues mv_indicator_{id} des indicateurs matérialisés.
+À exécuter après recompile_indicators.py (les vues sont créées depuis le SQL compilé).
+"""
+
+from sqlalchemy import text
+from app.core.database import SessionLocal, engine
+from app.dao.indicator_dao import IndicatorDao
+from app.dao.materialized_view_dao import view_name
+from app.services.materialized_indicator_service import MaterializedIndicatorService
+
+
+def add_materialized_column():
+    """Colonnes materialized et materialized_versions (idempotent)."""
+    statements = [
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS materialized BOOLEAN NOT NULL DEFAULT false",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS materialized_versions JSONB",
+    ]
+    for sql in statements:
+        with engine.begin() as conn:
+            try:
+                conn.execute(text(sql))
+                print(f"✅ {sql}")
+            except Exception as e:
+                print(f"⚠️  Erreur: {sql} - {str(e)[:100]}")
+
+
+def build_materialized_views():
+    """(Re)crée la vue de chaque indicateur matérialisé."""
+    service = MaterializedIndicatorService()
+    db = SessionLocal()
+    try:
+        indicators = IndicatorDao().get_materialized(db)
+        built = 0
+        for indicator in indicators:
+            try:
+                service.build(db, indicator)
+                built += 1
+                print(f"✅ {view_name(indicator.id)} ({indicator.title})")
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️  Erreur: {view_name(indicator.id)} - {str(e)[:100]}")
+        print(f"✅ {built}/{len(indicators)} vues matérialisées créées")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    add_materialized_column()
+    build_materialized_views()
@@ -0,0 +1,32 @@
+"""
+Script pour ajouter la colonne row_hash (empreinte du contenu importé)
+aux tables de données existantes.
+À exécuter une fois sur une base créée avant l'ajout de la colonne.
+"""
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def add_row_hash():
+    """Ajoute row_hash à insertion, etudiants et mobilite (idempotent)."""
+    statements = [
+        "ALTER TABLE insertion ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64)",
+        "ALTER TABLE etudiants ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64)",
+        "ALTER TABLE mobilite ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64)",
+    ]
+
+    for sql in statements:
+        with engine.begin() as conn:
+            try:
+                conn.execute(text(sql))
+                print(f"✅ {sql}")
+            except Exception as e:
+                print(f"⚠️  Erreur: {sql} - {str(e)[:100]}")
+
+    # le catalogue des colonnes est un cache du process de l'API: ce script ne peut pas le vider
+    print("ℹ️  Colonnes modifiées: appelez POST /api/v1/metadata/schema/refresh (admin) ou redémarrez l'API")
+
+
+if __name__ == "__main__":
+    add_row_hash()
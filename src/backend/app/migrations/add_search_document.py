@@ -0,0 +1,65 @@
+"""
+Script pour ajouter la recherche globale indexée (search_document + index trigrammes)
+aux tables de données existantes.
+À exécuter une fois sur une base créée avant l'ajout de la colonne; les imports
+suivants tiennent la colonne à jour.
+"""
+
+from sqlalchemy import text
+from app.core.database import engine
+from app.dao.metadata_dao import MetadataDao
+from app.utils.search_document import SEARCH_DOCUMENT_COLUMN, search_document_sql
+
+TABLES = ["insertion", "etudiants", "mobilite"]
+
+
+def add_search_document():
+    """Extension pg_trgm, colonne search_document, backfill et index GIN (idempotent)."""
+    metadata = MetadataDao()
+
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            print("✅ Extension pg_trgm")
+        except Exception as e:
+            print(f"⚠️  Erreur: CREATE EXTENSION pg_trgm - {str(e)[:100]}")
+            return
+
+    for table in TABLES:
+        with engine.begin() as conn:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_DOCUMENT_COLUMN} TEXT"
+                ))
+
+                # colonnes de la nomenclature réellement présentes, dans l'ordre de la nomenclature
+                existing = {
+                    row[0] for row in conn.execute(
+                        text("""
+                            SELECT column_name FROM information_schema.columns
+                            WHERE table_name = :table_name AND table_schema = current_schema()
+                        """),
+                        {"table_name": table},
+                    )
+                }
+                columns = [col for col in metadata.get_columns(table) if col in existing]
+                result = conn.execute(text(
+                    f"UPDATE {table} SET {SEARCH_DOCUMENT_COLUMN} = {search_document_sql(columns)} "
+                    f"WHERE {SEARCH_DOCUMENT_COLUMN} IS NULL"
+                ))
+                print(f"✅ {table}: {result.rowcount} lignes indexées")
+
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_search_document_trgm "
+                    f"ON {table} USING gin ({SEARCH_DOCUMENT_COLUMN} gin_trgm_ops)"
+                ))
+                print(f"✅ idx_{table}_search_document_trgm")
+            except Exception as e:
+                print(f"⚠️  Erreur: {table} - {str(e)[:100]}")
+
+    # le catalogue des colonnes est un cache du process de l'API: ce script ne peut pas le vider
+    print("ℹ️  Colonnes modifiées: appelez POST /api/v1/metadata/schema/refresh (admin) ou redémarrez l'API")
+
+
+if __name__ == "__main__":
+    add_search_document()
@@ -0,0 +1,81 @@
+"""
+Script pour ajouter les colonnes de compilation aux indicateurs existants
+(compiled_sql, compiled_params, referenced_tables, referenced_columns, spec_hash, translator_version)
+et recompiler les indicateurs dont la version du traducteur a changé.
+À relancer après chaque incrément de TRANSLATOR_VERSION (ou avec --force).
+"""
+
+import argparse
+
+from sqlalchemy import text
+from app.core.database import SessionLocal, engine
+from app.dao.indicator_dao import IndicatorDao
+from app.services.materialized_indicator_service import MaterializedIndicatorService
+from app.utils.sql_translator import TRANSLATOR_VERSION, compile_indicator
+
+
+def add_compilation_columns():
+    """Colonnes de compilation et index GIN sur referenced_tables (idempotent)."""
+    statements = [
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS compiled_sql TEXT",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS compiled_params JSONB",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS referenced_tables JSONB",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS referenced_columns JSONB",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS spec_hash VARCHAR(64)",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS translator_version INTEGER",
+        # colonnes du modèle Indicator (cf. add_materialized_indicators.py), lues par l'ORM
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS materialized BOOLEAN NOT NULL DEFAULT false",
+        "ALTER TABLE indicators ADD COLUMN IF NOT EXISTS materialized_versions JSONB",
+        "CREATE INDEX IF NOT EXISTS idx_indicators_referenced_tables ON indicators USING gin (referenced_tables)",
+    ]
+
+    for sql in statements:
+        with engine.begin() as conn:
+            try:
+                conn.execute(text(sql))
+                print(f"✅ {sql}")
+            except Exception as e:
+                print(f"⚠️  Erreur: {sql} - {str(e)[:100]}")
+
+
+def recompile_indicators(force: bool = False):
+    """Recompile les indicateurs périmés (tous avec force=True), en une transaction."""
+    dao = IndicatorDao()
+    db = SessionLocal()
+    try:
+        if force:
+            indicators = dao.get_all(db, skip=0, limit=None)
+        else:
+            indicators = dao.get_stale(db, TRANSLATOR_VERSION)
+
+        failed = 0
+        for indicator in indicators:
+            compilation = compile_indicator(indicator.indicator)
+            if compilation["compiled_sql"] is None:
+                failed += 1
+                print(f"⚠️  Indicateur {indicator.id} ({indicator.title}): SQL non généré")
+            dao.save_compilation(db, indicator, compilation, commit=False)
+        db.commit()
+
+        # vues matérialisées recréées depuis le nouveau SQL
+        service = MaterializedIndicatorService()
+        for indicator in indicators:
+            if indicator.materialized and indicator.compiled_sql:
+                try:
+                    service.build(db, indicator)
+                except Exception as e:
+                    db.rollback()
+                    print(f"⚠️  Vue de l'indicateur {indicator.id}: {str(e)[:100]}")
+
+        print(f"✅ {len(indicators) - failed}/{len(indicators)} indicateurs compilés (traducteur v{TRANSLATOR_VERSION})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompile le SQL enregistré des indicateurs")
+    parser.add_argument("--force", action="store_true", help="recompiler tous les indicateurs")
+    args = parser.parse_args()
+
+    add_compilation_columns()
+    recompile_indicators(force=args.force)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, DateTime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
@@ -19,6 +19,21 @@ class Indicator(Base):
     description = Column(Text, nullable=True)
     indicator = Column(JSONB, nullable=False)
 
+    # Compilation persistée (IndicatorService, à la création / modification):
+    # SQL prêt à exécuter, dépendances (filtre par table) et version du traducteur
+    compiled_sql = Column(Text, nullable=True)
+    compiled_params = Column(JSONB, nullable=True)
+    referenced_tables = Column(JSONB, nullable=True)
+    referenced_columns = Column(JSONB, nullable=True)
+    spec_hash = Column(String(64), nullable=True)
+    translator_version = Column(Integer, nullable=True)
+
+    # Résultat servi par la vue matérialisée mv_indicator_{id}, rafraîchie après import
+    materialized = Column(Boolean, nullable=False, default=False, server_default="false")
+    # Versions des tables lues ({table: version}) au dernier (re)calcul de la vue:
+    # une vue en retard sur table_versions est rafraîchie avant d'être lue
+    materialized_versions = Column(JSONB, nullable=True)
+
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
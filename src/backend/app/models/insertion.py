@@ -1,14 +1,22 @@
 from sqlalchemy import Column, Integer, String, Text
 
 from app.core.database import Base
+from app.utils.search_document import search_document_index
 
 
 class Insertion(Base):
     __tablename__ = "insertion"
+    __table_args__ = (search_document_index("insertion"),)
 
     # PK
     code = Column(String(64), primary_key=True, index=True)
 
+    # Empreinte (sha256) du contenu importé: permet de sauter les lignes inchangées
+    row_hash = Column(String(64), nullable=True)
+
+    # Texte de toutes les colonnes (recherche globale, index trigrammes pg_trgm)
+    search_document = Column(Text, nullable=True)
+
     # Champs très variables -> Text (sauf num évident)
     date = Column(Text, nullable=True)  # ex: "mars-23"
     promotion = Column(Integer, nullable=True)  # ex: 2022
@@ -1,13 +1,21 @@
 from sqlalchemy import Column, Integer, String, Text
 
 from app.core.database import Base
+from app.utils.search_document import search_document_index
 
 class Mobilite(Base):
     __tablename__ = "mobilite"
+    __table_args__ = (search_document_index("mobilite"),)
 
     # PK
     id_polytech = Column(String(64), primary_key=True, index=True)
 
+    # Empreinte (sha256) du contenu importé: permet de sauter les lignes inchangées
+    row_hash = Column(String(64), nullable=True)
+
+    # Texte de toutes les colonnes (recherche globale, index trigrammes pg_trgm)
+    search_document = Column(Text, nullable=True)
+
     sexe = Column(String(8), nullable=True)
     filiere = Column(String(64), nullable=True)
     cursus = Column(String(64), nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class TableVersion(Base):
+    """
+    Version des données d'une table (insertion, etudiants, mobilite):
+    incrémentée dans la transaction de chaque import / suppression.
+    Sert de clé aux caches d'export (ETag).
+    """
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
 
 class IndicatorBase(BaseModel):
@@ -9,18 +9,26 @@ class IndicatorBase(BaseModel):
 
 
 class IndicatorCreate(IndicatorBase):
-    pass
+    materialized: bool = False
 
 
 class IndicatorUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
     description: Optional[str] = None
     indicator: Optional[Any] = None
+    materialized: Optional[bool] = None
 
 
 class IndicatorResponse(IndicatorBase):
     id: int
     created_by: Optional[int] = None
+    compiled_sql: Optional[str] = None
+    compiled_params: Optional[Dict[str, Any]] = None
+    referenced_tables: Optional[List[str]] = None
+    referenced_columns: Optional[List[str]] = None
+    spec_hash: Optional[str] = None
+    translator_version: Optional[int] = None
+    materialized: bool = False
 
     class Config:
         from_attributes = True
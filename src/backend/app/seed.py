@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.core.security import get_password_hash
 from app.models.user import User, UserRole
 from app.models.indicator import Indicator
+from app.utils.sql_translator import compile_indicator
 
 
 def seed_users(db: Session) -> None:
@@ -1196,6 +1197,7 @@ def seed_predefined_indicators(db: Session) -> None:
                 description=item["description"],
                 indicator=item["indicator"],
                 created_by=admin_user.id if admin_user else None,
+                **compile_indicator(item["indicator"]),
             )
         )
 
@@ -6,6 +6,7 @@ Ces indicateurs sont basés sur la table insertion et suivent les fiches indicat
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.models.indicator import Indicator
+from app.utils.sql_translator import compile_indicator
 from app.models.user import User
 from app.models.report import Report, report_indicators
 
@@ -287,7 +288,8 @@ def create_cti_indicators(db: Session):
             title=item["title"],
             description=item["description"],
             indicator=item["indicator"],
-            created_by=admin_user.id if admin_user else None
+            created_by=admin_user.id if admin_user else None,
+            **compile_indicator(item["indicator"])
         )
         db.add(indicator)
         created_indicators.append(indicator)
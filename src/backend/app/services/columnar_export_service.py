@@ -0,0 +1,244 @@
+import io
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.dao.metadata_dao import MetadataDao
+from app.dao.insertion_dao import InsertionDao
+from app.dao.etudiants_dao import EtudiantsDao
+from app.dao.mobilite_dao import MobiliteDao
+from app.dao.streaming import iter_query_rows
+from app.models.insertion import Insertion
+from app.models.etudiants import Etudiants
+from app.models.mobilite import Mobilite
+from app.services.table_query_builder import TableQueryBuilder
+
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Export Parquet/Arrow non disponible. Installez pyarrow: pip install pyarrow",
+        )
+    return pyarrow
+
+
+class _ChunkSink:
+    """
+    Fichier en écriture seule qui garde les octets écrits jusqu'au prochain drain():
+    le writer pyarrow écrit dedans, la réponse HTTP vide le tampon après chaque record batch.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _open_writer(pa, sink, schema, file_format: str):
+    if file_format == "parquet":
+        return pa.parquet.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="snappy")
+    return pa.ipc.new_file(pa.PythonFile(sink, mode="w"), schema)
+
+
+def _to_int(value: Any) -> Optional[int]:
+    """Valeur d'une colonne Integer: None si elle n'est pas convertible (données historiques)."""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+class ColumnarExportService:
+    """
+    Export Parquet / Arrow IPC des tables et des résultats d'indicateurs.
+    Les types viennent des modèles SQLAlchemy (Integer -> int64, le reste -> string)
+    et les données sont écrites par record batches depuis un curseur côté serveur.
+    Seules les colonnes de la nomenclature sont lues (comme l'export CSV): les colonnes
+    internes (row_hash, search_document) ne sortent pas.
+    pyarrow est une dépendance optionnelle.
+    """
+
+    def __init__(self):
+        self.metadata = MetadataDao()
+        self.query_builder = TableQueryBuilder()
+
+        self._dao_by_table = {
+            "insertion": InsertionDao(),
+            "etudiants": EtudiantsDao(),
+            "mobilite": MobiliteDao(),
+        }
+        self._model_by_table = {
+            "insertion": Insertion,
+            "etudiants": Etudiants,
+            "mobilite": Mobilite,
+        }
+
+    def check_format(self, file_format: str) -> None:
+        """Format connu et pyarrow installé (à vérifier avant l'ETag / le 304)."""
+        if file_format not in COLUMNAR_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format non supporté '{file_format}'. Formats autorisés: {list(COLUMNAR_FORMATS)}",
+            )
+        _require_pyarrow()
+
+    def check_export(self, table: str, file_format: str) -> None:
+        """Paramètres d'un export de table valides (400/500 avant l'ETag / le 304)."""
+        self._check_params(table, file_format)
+        _require_pyarrow()
+
+    def _check_params(self, table: str, file_format: str) -> None:
+        allowed = self.metadata.get_tables()
+        if table not in allowed or table not in self._dao_by_table:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Table inconnue '{table}'. Tables autorisées: {allowed}",
+            )
+        if file_format not in COLUMNAR_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format non supporté '{file_format}'. Formats autorisés: {list(COLUMNAR_FORMATS)}",
+            )
+
+    def _integer_columns(self, table: str) -> set:
+        model = self._model_by_table[table]
+        return {col.name for col in model.__table__.columns if isinstance(col.type, Integer)}
+
+    def iter_table(self, db: Session, table: str, file_format: str = "parquet") -> Iterator[bytes]:
+        """Fichier Parquet/Arrow de la table, produit par morceaux (un par record batch)."""
+        self._check_params(table, file_format)
+        pa = _require_pyarrow()
+
+        columns: List[str] = self.metadata.get_columns(table)
+        int_columns = self._integer_columns(table)
+        schema = pa.schema([
+            (col, pa.int64() if col in int_columns else pa.string())
+            for col in columns
+        ])
+        fetch_size = settings.EXPORT_FETCH_SIZE
+
+        sink = _ChunkSink()
+        writer = _open_writer(pa, sink, schema, file_format)
+
+        def _write_batch(data: Dict[str, List[Any]]) -> None:
+            writer.write_batch(pa.RecordBatch.from_pydict(data, schema=schema))
+
+        data: Dict[str, List[Any]] = {col: [] for col in columns}
+        pending = 0
+        # projection sur la nomenclature (pas de SELECT *), sans tri
+        query = self.query_builder.build(db, table, columns=columns, default_order=False)
+        for r in iter_query_rows(db, query.select_sql(), query.params, fetch_size):
+            for col in columns:
+                value = r.get(col)
+                if col in int_columns:
+                    data[col].append(_to_int(value))
+                else:
+                    data[col].append(None if value is None else str(value))
+            pending += 1
+            if pending >= fetch_size:
+                _write_batch(data)
+                data = {col: [] for col in columns}
+                pending = 0
+                yield sink.drain()
+
+        if pending:
+            _write_batch(data)
+        writer.close()
+        yield sink.drain()
+
+    def stream_table(self, table: str, file_format: str = "parquet") -> Iterator[bytes]:
+        """Comme iter_table, avec sa propre session (consommé par une StreamingResponse)."""
+        self.check_export(table, file_format)
+
+        def _chunks() -> Iterator[bytes]:
+            db = SessionLocal()
+            try:
+                yield from self.iter_table(db, table, file_format)
+            finally:
+                db.close()
+
+        return _chunks()
+
+    def build_report_archive(self, results: List[Dict[str, Any]], file_format: str = "parquet") -> bytes:
+        """
+        ZIP d'un fichier Parquet/Arrow par indicateur (résultats en erreur ignorés).
+        Types déduits des valeurs renvoyées par PostgreSQL ; colonne en string si elle est hétérogène.
+        """
+        if file_format not in COLUMNAR_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format non supporté '{file_format}'. Formats autorisés: {list(COLUMNAR_FORMATS)}",
+            )
+        pa = _require_pyarrow()
+        extension = "parquet" if file_format == "parquet" else "arrow"
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            for result in results:
+                exec_result = result["execution_result"]
+                if exec_result.get("error"):
+                    continue
+
+                columns = exec_result["columns"]
+                arrays = []
+                for col in columns:
+                    values = [row.get(col) for row in exec_result["rows"]]
+                    try:
+                        arrays.append(pa.array(values))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError):
+                        arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+                table = pa.Table.from_arrays(arrays, names=columns)
+
+                sink = _ChunkSink()
+                writer = _open_writer(pa, sink, table.schema, file_format)
+                writer.write_table(table)
+                writer.close()
+                archive.writestr(f"indicateur_{result['indicator_id']}.{extension}", sink.drain())
+
+        return buffer.getvalue()
@@ -1,22 +1,27 @@
 import csv
 import io
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.dao.metadata_dao import MetadataDao
 from app.dao.insertion_dao import InsertionDao
 from app.dao.etudiants_dao import EtudiantsDao
 from app.dao.mobilite_dao import MobiliteDao
+from app.dao.streaming import iter_query_rows
+from app.services.table_query_builder import TableQuery, TableQueryBuilder
 
 
 class CsvExportService:
     """
     Export CSV générique d'une table cible.
     - Table autorisée = MetadataDao.get_tables()
-    - Colonnes = MetadataDao.get_columns(table)
-    - Les données viennent des DAO (méthode export_all)
+    - Colonnes = MetadataDao.get_columns(table), ou la projection demandée (columns=)
+    - Recherche / filtres / tri: TableQueryBuilder (comme le navigateur de tables)
+    - Les données sont lues par un curseur côté serveur (iter_query_rows)
     """
 
     def __init__(self):
@@ -28,6 +33,7 @@ class CsvExportService:
             "etudiants": EtudiantsDao(),
             "mobilite": MobiliteDao(),
         }
+        self.query_builder = TableQueryBuilder()
 
     def _get_dao(self, table: str):
         dao = self._dao_by_table.get(table)
@@ -38,13 +44,7 @@ class CsvExportService:
             )
         return dao
 
-    def export_csv(
-        self,
-        db: Session,
-        table: str,
-        delimiter: str = ";",
-        include_bom: bool = True,
-    ) -> Dict[str, Any]:
+    def _check_params(self, table: str, delimiter: str) -> None:
         allowed = self.metadata.get_tables()
         if table not in allowed:
             raise HTTPException(
@@ -58,31 +58,132 @@ class CsvExportService:
                 detail="Delimiter invalide. Utilise ',', ';' ou '\\t'.",
             )
 
-        columns: List[str] = self.metadata.get_columns(table)
-        dao = self._get_dao(table)
-
-        # ✅ Le DAO doit renvoyer une liste de dict (clé=colonne)
-        rows: List[Dict[str, Any]] = dao.export_all(db)
+    def prepare_query(
+        self,
+        db: Session,
+        table: str,
+        delimiter: str = ";",
+        columns: Optional[List[str]] = None,
+        search: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        filters: Optional[List[str]] = None,
+    ) -> TableQuery:
+        """
+        Valide les paramètres et construit la requête d'export (même constructeur
+        que le navigateur de tables): seules les colonnes et lignes demandées sont lues.
+        """
+        self._check_params(table, delimiter)
+        self._get_dao(table)
+        projection = self.query_builder.parse_columns(table, columns)
+        return self.query_builder.build(
+            db,
+            table,
+            # sans projection: colonnes de la nomenclature (pas de SELECT *)
+            columns=projection or self.metadata.get_columns(table),
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            filters=self.query_builder.parse_filters(filters),
+            # pas de tri imposé: l'export complet n'a pas à trier toute la table
+            default_order=False,
+        )
+
+    def iter_csv(
+        self,
+        db: Session,
+        query: TableQuery,
+        delimiter: str = ";",
+        include_bom: bool = True,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Iterator[str]:
+        """
+        Produit le CSV par morceaux (EXPORT_FETCH_SIZE lignes chacun) à mesure que
+        les lignes arrivent du curseur côté serveur: mémoire indépendante de la taille de la table.
+        stats (optionnel) reçoit row_count une fois le flux consommé.
+        """
+        columns = query.columns
+        fetch_size = settings.EXPORT_FETCH_SIZE
 
         sio = io.StringIO()
         writer = csv.writer(sio, delimiter=delimiter, lineterminator="\n")
 
-        # header
+        # BOM UTF-8 pour Excel (optionnel) + header
+        if include_bom:
+            sio.write("\ufeff")
         writer.writerow(columns)
 
-        # rows
-        for r in rows:
+        pending = 0
+        row_count = 0
+        for r in iter_query_rows(db, query.select_sql(), query.params, fetch_size):
             writer.writerow([(r.get(col) if r.get(col) is not None else "") for col in columns])
+            pending += 1
+            row_count += 1
+            if pending >= fetch_size:
+                yield sio.getvalue()
+                sio.seek(0)
+                sio.truncate(0)
+                pending = 0
+
+        if stats is not None:
+            stats["row_count"] = row_count
+        yield sio.getvalue()
+
+    def stream_csv(
+        self,
+        table: str,
+        delimiter: str = ";",
+        include_bom: bool = True,
+        columns: Optional[List[str]] = None,
+        search: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        filters: Optional[List[str]] = None,
+    ) -> Iterator[str]:
+        """
+        Comme iter_csv, avec sa propre session: le flux est consommé par la
+        StreamingResponse après la fin de l'endpoint.
+        Les paramètres sont validés immédiatement (erreur 400 avant le début de la réponse).
+        """
+        db = SessionLocal()
+        try:
+            query = self.prepare_query(
+                db,
+                table,
+                delimiter=delimiter,
+                columns=columns,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                filters=filters,
+            )
+        except Exception:
+            db.close()
+            raise
 
-        csv_text = sio.getvalue()
+        def _chunks() -> Iterator[str]:
+            try:
+                yield from self.iter_csv(db, query, delimiter=delimiter, include_bom=include_bom)
+            finally:
+                db.close()
 
-        # BOM UTF-8 pour Excel (optionnel)
-        if include_bom:
-            csv_text = "\ufeff" + csv_text
+        return _chunks()
+
+    def export_csv(
+        self,
+        db: Session,
+        table: str,
+        delimiter: str = ";",
+        include_bom: bool = True,
+    ) -> Dict[str, Any]:
+        """Export complet en mémoire (petites tables / usage interne). Pour l'API: stream_csv."""
+        query = self.prepare_query(db, table, delimiter=delimiter)
+        stats: Dict[str, int] = {}
+        csv_text = "".join(self.iter_csv(db, query, delimiter=delimiter, include_bom=include_bom, stats=stats))
 
         return {
             "table": table,
-            "columns": columns,
-            "row_count": len(rows),
+            "columns": query.columns,
+            "row_count": stats["row_count"],
             "csv": csv_text,
         }
@@ -1,26 +1,44 @@
+import codecs
 import csv
+import hashlib
 import io
-from typing import Dict, Any, List, Tuple, Optional
+import json
+import threading
+from collections import Counter
+from datetime import date, datetime, time as dt_time
+from typing import BinaryIO, Callable, Dict, Any, Iterator, List, Tuple, Optional
 import re
 import unicodedata
 
 from app.utils.normalization import normalize_text_value
+from app.core.config import settings
 
-from fastapi import HTTPException, status, UploadFile
+from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, DataError, IntegrityError, ProgrammingError
 from sqlalchemy import Integer
 
+from app.dao.bulk_upsert import ROW_HASH_COLUMN
+from app.utils.search_document import SEARCH_DOCUMENT_COLUMN, build_search_document
 from app.dao.metadata_dao import MetadataDao
 from app.dao.insertion_dao import InsertionDao
 from app.dao.etudiants_dao import EtudiantsDao
 from app.dao.mobilite_dao import MobiliteDao
+from app.services.materialized_indicator_service import MaterializedIndicatorService
 
 from app.models.insertion import Insertion
 from app.models.etudiants import Etudiants
 from app.models.mobilite import Mobilite
 
 
+IMPORT_MODES = ("batch", "row", "bulk")
+IMPORT_FORMATS = ("csv", "xlsx")
+
+# Taille de l'échantillon de tête (encodage + délimiteur) et des lectures suivantes
+_SAMPLE_SIZE = 64 * 1024
+_READ_CHUNK_SIZE = 256 * 1024
+
+
 def _normalize_header(h: str) -> str:
     h = (h or "").strip().lower()
     h = re.sub(r"\s+", "_", h)
@@ -28,13 +46,88 @@ def _normalize_header(h: str) -> str:
     return h
 
 
-def _decode_bytes(b: bytes) -> str:
-    for enc in ("utf-8-sig", "utf-8", "latin-1"):
-        try:
-            return b.decode(enc)
-        except UnicodeDecodeError:
-            continue
-    return b.decode("utf-8", errors="replace")
+def _is_seekable(stream: BinaryIO) -> bool:
+    try:
+        return bool(stream.seekable())
+    except (AttributeError, ValueError):
+        return False
+
+
+def _is_valid_utf8(stream: BinaryIO, sample: bytes) -> bool:
+    """
+    Vrai si le fichier décode entièrement en UTF-8. Flux rembobinable (upload
+    spoolé, fichier de job): passe de validation morceau par morceau, en mémoire
+    bornée, puis retour à la position de départ. Sinon: échantillon de tête seul.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        # final=False: l'échantillon peut couper un caractère multi-octets en fin
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    if not _is_seekable(stream):
+        return True
+
+    start = stream.tell()
+    try:
+        while True:
+            chunk = stream.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+    finally:
+        stream.seek(start)
+
+
+def _detect_encoding(stream: BinaryIO, sample: bytes) -> str:
+    """Encodage du fichier: BOM, puis UTF-8 si tout le fichier est valide, sinon latin-1."""
+    if not _is_valid_utf8(stream, sample):
+        return "latin-1"
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    return "utf-8"
+
+
+def _iter_text_lines(stream: BinaryIO, encoding: str, head: bytes = b"") -> Iterator[str]:
+    """
+    Décode le flux par morceaux et produit les lignes (avec leur "\n")
+    pour csv.reader, sans jamais charger le fichier entier.
+    Décodage strict: un octet invalide (possible seulement si le flux n'a pas pu
+    être validé en entier) arrête l'import au lieu d'écrire des caractères U+FFFD.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        pending = decoder.decode(head) if head else ""
+        while True:
+            chunk = stream.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending += decoder.decode(chunk)
+            cut = pending.rfind("\n")
+            if cut == -1:
+                continue
+            complete, pending = pending[: cut + 1], pending[cut + 1 :]
+            for line in complete.split("\n")[:-1]:
+                yield line + "\n"
+
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Encodage invalide: le fichier n'est pas entièrement en {encoding} ({e.reason}). "
+                "Réenregistrez-le en UTF-8."
+            ),
+        )
+    if pending:
+        yield from (line + "\n" for line in pending.split("\n")[:-1])
+        last = pending[pending.rfind("\n") + 1 :]
+        if last:
+            yield last
 
 
 def _detect_delimiter(sample: str) -> str:
@@ -54,6 +147,84 @@ def _detect_delimiter(sample: str) -> str:
         pass
     return ";"
 
+def _open_csv_rows(stream: BinaryIO) -> Tuple[str, Iterator[List[str]]]:
+    """Détecte encodage + délimiteur sur l'échantillon de tête et retourne (délimiteur, lignes)."""
+    sample = stream.read(_SAMPLE_SIZE)
+    if not sample:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Fichier CSV vide.",
+        )
+
+    encoding = _detect_encoding(stream, sample)
+    sample_text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    delimiter = _detect_delimiter(sample_text)
+
+    return delimiter, csv.reader(_iter_text_lines(stream, encoding, head=sample), delimiter=delimiter)
+
+
+def _xlsx_cell_to_str(value: Any) -> str:
+    """Valeur de cellule Excel -> texte, comme elle apparaîtrait dans un export CSV."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Excel stocke tous les nombres en flottant: 2022.0 -> "2022"
+        return str(int(value))
+    if isinstance(value, datetime):
+        if value.time() == dt_time(0, 0):
+            return value.date().isoformat()
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _open_xlsx_rows(stream: BinaryIO, sheet: Optional[str] = None) -> Tuple[str, Iterator[List[str]]]:
+    """
+    Ouvre un classeur en read_only (lecture en flux des lignes, mémoire bornée)
+    et retourne (nom de la feuille, lignes converties en texte).
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Import Excel non disponible. Installez openpyxl: pip install openpyxl",
+        )
+
+    try:
+        wb = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fichier XLSX invalide: {type(e).__name__}: {e}",
+        )
+
+    if sheet is not None and sheet not in wb.sheetnames:
+        wb.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Feuille inconnue '{sheet}'. Feuilles disponibles: {wb.sheetnames}",
+        )
+    ws = wb[sheet] if sheet is not None else wb.active
+
+    def _rows() -> Iterator[List[str]]:
+        try:
+            for values in ws.iter_rows(values_only=True):
+                yield [_xlsx_cell_to_str(v) for v in values]
+        finally:
+            wb.close()
+
+    return ws.title, _rows()
+
+
+def _compute_row_hash(payload: Dict[str, Any], columns: List[str]) -> str:
+    """Empreinte stable (sha256) du payload normalisé, dans l'ordre des colonnes de la nomenclature."""
+    values = [payload.get(col) for col in columns]
+    serialized = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
 def _looks_like_int(s: str) -> bool:
     if s is None:
         return False
@@ -77,6 +248,35 @@ def _build_sqlalchemy_error_detail(e: Exception) -> str:
     return " | ".join(parts)
 
 
+class ImportCancelled(Exception):
+    """Levée dans la boucle d'import quand l'annulation a été demandée."""
+
+
+class ImportProgress:
+    """
+    Compteurs d'avancement d'un import, lus depuis un autre thread
+    (jobs d'import en arrière-plan) ; permet aussi de demander l'annulation.
+    """
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_processed = 0
+        self.error_count = 0
+        self.bytes_read = 0
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel_event.is_set():
+            raise ImportCancelled()
+
+
 class CsvImportService:
     """
     Import CSV générique vers une table cible.
@@ -85,6 +285,7 @@ class CsvImportService:
 
     def __init__(self):
         self.metadata = MetadataDao()
+        self.materialized = MaterializedIndicatorService()
 
         self._dao_by_table = {
             "insertion": ("code", InsertionDao()),
@@ -99,6 +300,20 @@ class CsvImportService:
             "mobilite": Mobilite,
         }
 
+    def _publish_partial_import(self, db: Session, dao, table: str, bump: bool) -> None:
+        """
+        Import interrompu après des commits: nouvelle version de la table (si les
+        lignes n'en ont pas déjà publié une, cf. _flush) et vues matérialisées rafraîchies.
+        Au mieux: l'erreur d'origine reste celle remontée à l'appelant.
+        """
+        try:
+            if bump:
+                dao.versions.bump(db, table)
+                db.commit()
+            self.materialized.refresh_for_tables(db, [table])
+        except Exception:
+            db.rollback()
+
     def _get_expected_columns(self, table: str) -> List[str]:
         return self.metadata.get_columns(table)
 
@@ -123,7 +338,62 @@ class CsvImportService:
             return []
         return int_cols
 
-    async def import_csv(self, db: Session, table: str, file: UploadFile) -> Dict[str, Any]:
+    def import_stream(
+        self,
+        db: Session,
+        table: str,
+        stream: BinaryIO,
+        mode: str = "batch",
+        batch_size: Optional[int] = None,
+        progress: Optional[ImportProgress] = None,
+        file_format: str = "csv",
+        sheet: Optional[str] = None,
+        dry_run: bool = False,
+        row_sink: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        reject_duplicate_pks: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Import d'un flux binaire CSV ou XLSX, en mémoire bornée :
+        - csv: encodage et délimiteur détectés sur un échantillon de tête, puis
+          décodage incrémental et lecture csv.reader morceau par morceau
+        - xlsx: openpyxl en read_only, lignes itérées une à une (sheet = nom de
+          la feuille, feuille active par défaut)
+        Les deux alimentent la même normalisation d'en-têtes, validation et upsert.
+        progress (optionnel) est mis à jour au fil de l'eau ; si l'annulation
+        est demandée, ImportCancelled est levée (les lots déjà commités restent).
+
+        Modes:
+          - batch (défaut): lignes validées en Python puis envoyées par lots
+            (un INSERT multi-VALUES + un commit par lot, bisection si un lot échoue)
+          - row: un upsert + un commit par ligne (ancien comportement)
+          - bulk: COPY FROM STDIN dans une table de staging temporaire puis
+            un seul INSERT ... SELECT ... ON CONFLICT (gros fichiers, tout ou rien)
+
+        dry_run=True: validation seule, sans aucun accès à la base (en-têtes, PK,
+        types, PK en double dans le fichier) et rapport d'erreurs complet.
+        row_sink (dry_run uniquement): reçoit chaque ligne valide, avec son empreinte,
+        pour un chargement ultérieur (import groupé).
+        reject_duplicate_pks=False (dry_run): PK en double acceptées, la dernière ligne
+        l'emportera au chargement (même règle que l'import simple).
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format d'import inconnu '{file_format}'. Formats autorisés: {list(IMPORT_FORMATS)}",
+            )
+        if mode not in IMPORT_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Mode d'import inconnu '{mode}'. Modes autorisés: {list(IMPORT_MODES)}",
+            )
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        progress = progress or ImportProgress()
+        if batch_size < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="batch_size doit être >= 1.",
+            )
+
         allowed = self.metadata.get_tables()
         if table not in allowed:
             raise HTTPException(
@@ -140,25 +410,18 @@ class CsvImportService:
                 detail=f"Configuration invalide: la clé primaire '{pk_field}' n'est pas dans les colonnes attendues.",
             )
 
-        raw = await file.read()
-        if not raw:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Fichier CSV vide.",
-            )
-
-        text = _decode_bytes(raw)
-        delimiter = _detect_delimiter(text)
-
-        sio = io.StringIO(text)
-        reader = csv.reader(sio, delimiter=delimiter)
+        delimiter: Optional[str] = None
+        if file_format == "xlsx":
+            sheet, reader = _open_xlsx_rows(stream, sheet)
+        else:
+            delimiter, reader = _open_csv_rows(stream)
 
         try:
             header_raw = next(reader)
         except StopIteration:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="CSV vide (aucune ligne).",
+                detail="Fichier vide (aucune ligne).",
             )
 
         header_norm = [_normalize_header(h) for h in header_raw]
@@ -210,7 +473,12 @@ class CsvImportService:
 
         processed = 0
         upserted = 0
+        # détail inserted/updated/unchanged: non disponible en mode row (upsert systématique)
+        inserted: Optional[int] = None
+        updated: Optional[int] = None
         errors: List[str] = []
+        # même erreurs, structurées (rapport complet du dry-run)
+        error_records: List[Dict[str, Any]] = []
 
         int_columns = set(self._get_integer_columns_from_model(table))
 
@@ -222,11 +490,23 @@ class CsvImportService:
                     suspects[k] = payload[k]
             return f"pk={pk_field}={pk_val} | int_fields={suspects}"
 
-        def _push_error(line: int, msg: str, payload: Optional[Dict[str, Any]] = None):
+        def _push_error(
+            line: int,
+            msg: str,
+            payload: Optional[Dict[str, Any]] = None,
+            column: Optional[str] = None,
+        ):
             if payload:
                 errors.append(f"Ligne {line}: {msg} ({_payload_debug(payload)})")
             else:
                 errors.append(f"Ligne {line}: {msg}")
+            error_records.append({
+                "line": line,
+                "pk": payload.get(pk_field) if payload else None,
+                "column": column,
+                "message": msg,
+            })
+            progress.error_count = len(errors)
 
         def _prepare_payload(row: List[str]) -> Dict[str, Any]:
             payload: Dict[str, Any] = {}
@@ -243,59 +523,222 @@ class CsvImportService:
                 payload[col] = norm_val
             return payload
 
-        def _validate_types(payload: Dict[str, Any]) -> Optional[str]:
+        def _validate_types(payload: Dict[str, Any]) -> List[Tuple[str, str]]:
             """
-            Retourne un message d'erreur si une valeur ne match pas le type attendu,
-            sinon None.
+            Retourne (colonne, message d'erreur) pour chaque valeur qui ne match
+            pas le type attendu ; liste vide si tout est valide.
             """
-            for col in int_columns:
+            type_errors: List[Tuple[str, str]] = []
+            for col in expected_cols:
+                if col not in int_columns:
+                    continue
                 v = payload.get(col)
                 if v is None:
                     continue
                 # v est string (normalisé)
                 if isinstance(v, str) and not _looks_like_int(v):
-                    return f"Colonne '{col}' attend un entier mais reçu: {v!r}"
-            return None
+                    type_errors.append((col, f"Colonne '{col}' attend un entier mais reçu: {v!r}"))
+            return type_errors
 
-        # Parcours ligne par ligne avec SAVEPOINT pour éviter l'abort global
-        for row_num, row in enumerate(reader, start=2):
-            if not row or all((c or "").strip() == "" for c in row):
-                continue
+        def _upsert_batch(batch: List[Tuple[int, Dict[str, Any]]]) -> Counter:
+            """
+            Envoie un lot en un seul INSERT multi-VALUES (SAVEPOINT).
+            Si le lot échoue, on le coupe en deux récursivement pour isoler
+            la ou les lignes fautives et garder un rapport d'erreur par ligne.
+            Retourne les compteurs processed / inserted / updated du lot.
+            """
+            if not batch:
+                return Counter()
+            try:
+                with db.begin_nested():
+                    counts = dao.upsert_many(db, [payload for _, payload in batch])
+                return Counter(processed=len(batch), **counts)
+            except Exception as e:
+                if len(batch) == 1:
+                    row_num, payload = batch[0]
+                    if isinstance(e, ValueError):
+                        _push_error(row_num, str(e), payload)
+                    else:
+                        _push_error(row_num, _build_sqlalchemy_error_detail(e), payload)
+                    return Counter()
+                middle = len(batch) // 2
+                return _upsert_batch(batch[:middle]) + _upsert_batch(batch[middle:])
+
+        def _flush(batch: List[Tuple[int, Dict[str, Any]]]) -> Counter:
+            done = _upsert_batch(batch)
+            if done["inserted"] or done["updated"]:
+                # version de la table (caches d'export) publiée avec le lot
+                dao.versions.bump(db, table)
+            # un commit par lot (et non plus par ligne)
+            db.commit()
+            return done
 
-            if len(row) <= max_index_needed:
-                row = row + [""] * (max_index_needed + 1 - len(row))
+        # dry-run: PK déjà vues dans le fichier -> première ligne
+        seen_pks: Dict[str, int] = {}
 
-            payload = _prepare_payload(row)
+        def _iter_valid_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+            """
+            Lignes normalisées et validées (PK + types) AVANT DB.
+            Les lignes invalides sont écartées et ajoutées aux erreurs au passage.
+            """
+            for row_num, row in enumerate(reader, start=2):
+                progress.check_cancelled()
+                if not row or all((c or "").strip() == "" for c in row):
+                    continue
+                progress.rows_read += 1
 
-            pk_val = payload.get(pk_field)
-            if pk_val is None or (isinstance(pk_val, str) and pk_val.strip() == ""):
-                _push_error(row_num, f"clé primaire '{pk_field}' vide.", payload)
-                continue
+                if len(row) <= max_index_needed:
+                    row = row + [""] * (max_index_needed + 1 - len(row))
 
-            # validation types AVANT DB
-            type_err = _validate_types(payload)
-            if type_err:
-                _push_error(row_num, type_err, payload)
-                continue
+                payload = _prepare_payload(row)
 
-            # SAVEPOINT: une ligne en erreur ne casse pas tout
-            try:
-                with db.begin_nested():
-                    dao.upsert(db, payload)
-                upserted += 1
-                processed += 1
-            except ValueError as ve:
-                _push_error(row_num, str(ve), payload)
-            except (DataError, IntegrityError, ProgrammingError, SQLAlchemyError) as se:
-                _push_error(row_num, _build_sqlalchemy_error_detail(se), payload)
-                # rollback du nested est automatique, mais on sécurise
-                db.rollback()
-            except Exception as e:
-                _push_error(row_num, _build_sqlalchemy_error_detail(e), payload)
-                db.rollback()
+                pk_val = payload.get(pk_field)
+                if pk_val is None or (isinstance(pk_val, str) and pk_val.strip() == ""):
+                    _push_error(row_num, f"clé primaire '{pk_field}' vide.", payload, column=pk_field)
+                    continue
+
+                duplicate = False
+                if dry_run and reject_duplicate_pks:
+                    # avant la validation des types: une ligne mal typée compte aussi
+                    # pour les doublons (rapport complet)
+                    pk_key = dao.normalize_pk(pk_val)
+                    first_line = seen_pks.get(pk_key)
+                    if first_line is not None:
+                        _push_error(
+                            row_num,
+                            f"clé primaire '{pk_field}' en double (déjà présente ligne {first_line}).",
+                            payload,
+                            column=pk_field,
+                        )
+                        duplicate = True
+                    else:
+                        seen_pks[pk_key] = row_num
+
+                # validation types AVANT DB
+                type_errors = _validate_types(payload)
+                if type_errors:
+                    # dry-run: toutes les colonnes fautives ; import: la première suffit
+                    for col, msg in (type_errors if dry_run else type_errors[:1]):
+                        _push_error(row_num, msg, payload, column=col)
+                    continue
+                if duplicate:
+                    continue
+
+                if not dry_run or row_sink is not None:
+                    # PK telle qu'elle sera stockée (normalize_pk du DAO, idempotent): l'empreinte
+                    # et le document de recherche portent sur la valeur en base
+                    payload[pk_field] = dao.normalize_pk(pk_val)
+                    # empreinte du contenu: permet de sauter les lignes inchangées
+                    payload[ROW_HASH_COLUMN] = _compute_row_hash(payload, expected_cols)
+                    # recherche globale: tenu à jour à chaque import (hors empreinte)
+                    payload[SEARCH_DOCUMENT_COLUMN] = build_search_document(payload, expected_cols)
+
+                yield row_num, payload
+
+        if dry_run:
+            # validation seule: aucune requête, aucun commit
+            valid_rows = 0
+            for row_num, payload in _iter_valid_rows():
+                valid_rows += 1
+                if row_sink is not None:
+                    row_sink(row_num, payload)
+            progress.rows_processed = valid_rows
+            return {
+                "status": "ok" if not errors else "invalid",
+                "dry_run": True,
+                "table": table,
+                "format": file_format,
+                "delimiter": delimiter,
+                "sheet": sheet,
+                "rows_read": progress.rows_read,
+                "valid_rows": valid_rows,
+                "ignored_columns": ignored_columns,
+                "errors": error_records,
+                "error_count": len(errors),
+            }
+
+        try:
+            if mode == "row":
+                for row_num, payload in _iter_valid_rows():
+                    # SAVEPOINT: une ligne en erreur ne casse pas tout
+                    try:
+                        with db.begin_nested():
+                            dao.upsert(db, payload)
+                        upserted += 1
+                        processed += 1
+                        progress.rows_processed = processed
+                    except ValueError as ve:
+                        _push_error(row_num, str(ve), payload)
+                    except (DataError, IntegrityError, ProgrammingError, SQLAlchemyError) as se:
+                        _push_error(row_num, _build_sqlalchemy_error_detail(se), payload)
+                        # rollback du nested est automatique, mais on sécurise
+                        db.rollback()
+                    except Exception as e:
+                        _push_error(row_num, _build_sqlalchemy_error_detail(e), payload)
+                        db.rollback()
+
+            elif mode == "bulk":
+                valid_rows = 0
+
+                def _count_valid_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+                    nonlocal valid_rows
+                    for item in _iter_valid_rows():
+                        valid_rows += 1
+                        yield item
+
+                # COPY en staging puis fusion en une requête: tout ou rien
+                try:
+                    counts = dao.copy_merge(
+                        db, expected_cols + [ROW_HASH_COLUMN, SEARCH_DOCUMENT_COLUMN], _count_valid_rows()
+                    )
+                except (ImportCancelled, HTTPException):
+                    # annulation / fichier invalide relevés tels quels après le COPY
+                    db.rollback()
+                    raise
+                except Exception as e:
+                    db.rollback()
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Erreur lors du chargement massif (aucune ligne importée): {_build_sqlalchemy_error_detail(e)}",
+                    )
+                processed = valid_rows
+                inserted = counts["inserted"]
+                updated = counts["updated"]
+                upserted = inserted + updated
+                progress.rows_processed = processed
+
+            else:
+                batch: List[Tuple[int, Dict[str, Any]]] = []
+                totals: Counter = Counter()
+                for item in _iter_valid_rows():
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        totals += _flush(batch)
+                        progress.rows_processed = totals["processed"]
+                        upserted = totals["inserted"] + totals["updated"]
+                        batch = []
+
+                if batch:
+                    totals += _flush(batch)
+                    progress.rows_processed = totals["processed"]
+
+                processed = totals["processed"]
+                inserted = totals["inserted"]
+                updated = totals["updated"]
+                upserted = inserted + updated
+
+        except Exception:
+            # annulation ou erreur en cours d'import: les lignes déjà commitées (modes row
+            # et batch) doivent quand même invalider les caches et rafraîchir les vues
+            db.rollback()
+            if upserted:
+                self._publish_partial_import(db, dao, table, bump=mode == "row")
+            raise
 
         # commit global
         try:
+            if mode != "batch" and upserted:
+                dao.versions.bump(db, table)
             db.commit()
         except Exception as e:
             db.rollback()
@@ -304,6 +747,9 @@ class CsvImportService:
                 detail=f"Erreur commit final: {_build_sqlalchemy_error_detail(e)}",
             )
 
+        # vues matérialisées des indicateurs qui lisent cette table
+        refreshed_views = self.materialized.refresh_for_tables(db, [table]) if upserted else []
+
         # si trop d’erreurs
         if processed > 0 and len(errors) > processed * 0.1:
             raise HTTPException(
@@ -317,10 +763,27 @@ class CsvImportService:
         return {
             "status": "ok",
             "table": table,
+            "format": file_format,
             "delimiter": delimiter,
+            "sheet": sheet,
+            "mode": mode,
             "processed_rows": processed,
             "upserted_rows": upserted,
+            "inserted_rows": inserted,
+            "updated_rows": updated,
+            "unchanged_rows": processed - upserted if inserted is not None else None,
             "ignored_columns": ignored_columns,
             "errors": errors[:10] if errors else [],
             "error_count": len(errors),
+            "refreshed_views": refreshed_views,
         }
+
+
+def build_error_report_csv(report: Dict[str, Any]) -> str:
+    """Rapport d'erreurs d'un dry-run au format CSV (';' + BOM UTF-8 pour Excel)."""
+    sio = io.StringIO()
+    writer = csv.writer(sio, delimiter=";", lineterminator="\n")
+    writer.writerow(["ligne", "cle_primaire", "colonne", "message"])
+    for err in report.get("errors", []):
+        writer.writerow([err["line"], err["pk"] or "", err["column"] or "", err["message"]])
+    return "\ufeff" + sio.getvalue()
@@ -0,0 +1,103 @@
+import os
+import re
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Set
+
+from fastapi import HTTPException, status
+
+_FILE_CHUNK_SIZE = 256 * 1024
+
+# Caractères interdits dans un nom de feuille Excel
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def _sheet_title(title: str, used: Set[str]) -> str:
+    """Nom de feuille valide (31 caractères max, sans caractères interdits) et unique."""
+    base = _INVALID_SHEET_CHARS.sub(" ", title or "").strip()[:31] or "Indicateur"
+    candidate = base
+    suffix = 2
+    while candidate.lower() in used:
+        tail = f" ({suffix})"
+        candidate = base[:31 - len(tail)] + tail
+        suffix += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def write_report_xlsx(results: Iterable[Dict[str, Any]]) -> str:
+    """
+    Écrit le classeur d'un rapport avec openpyxl en mode write_only: chaque feuille
+    est écrite au fil des résultats (qui peuvent être produits un par un) et seules
+    les lignes en cours sont en mémoire. Retourne le chemin du fichier temporaire .xlsx
+    (à supprimer par l'appelant, cf. iter_temp_file).
+    """
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Export Excel non disponible. Installez openpyxl: pip install openpyxl"
+        )
+
+    wb = Workbook(write_only=True)
+    title_font = Font(bold=True, size=14)
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="E0E7FF", end_color="E0E7FF", fill_type="solid")
+    used_titles: Set[str] = set()
+
+    for result in results:
+        if result['execution_result'].get('error'):
+            continue
+
+        exec_result = result['execution_result']
+        columns = exec_result['columns']
+        ws = wb.create_sheet(title=_sheet_title(result['indicator_title'], used_titles))
+
+        # Titre (A1), ligne vide, en-têtes (ligne 3), données à partir de la ligne 4
+        title_cell = WriteOnlyCell(ws, value=result['indicator_title'])
+        title_cell.font = title_font
+        ws.append([title_cell])
+        ws.append([])
+
+        header = []
+        for col_name in columns:
+            cell = WriteOnlyCell(ws, value=col_name)
+            cell.font = header_font
+            cell.fill = header_fill
+            header.append(cell)
+        ws.append(header)
+
+        for row in exec_result['rows']:
+            ws.append([row.get(col_name, '') for col_name in columns])
+
+    if not used_titles:
+        # un classeur doit contenir au moins une feuille
+        ws = wb.create_sheet(title="Rapport")
+        ws.append(["Aucun résultat d'indicateur à exporter"])
+
+    fd, path = tempfile.mkstemp(prefix="report_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def iter_temp_file(path: str, chunk_size: int = _FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Lit un fichier temporaire par morceaux puis le supprime."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                yield data
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
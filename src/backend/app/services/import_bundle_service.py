@@ -0,0 +1,271 @@
+import csv
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status, UploadFile
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.dao.bulk_upsert import ROW_HASH_COLUMN
+from app.utils.search_document import SEARCH_DOCUMENT_COLUMN
+from app.services.csv_import_service import (
+    CsvImportService,
+    IMPORT_FORMATS,
+    _build_sqlalchemy_error_detail,
+    _normalize_header,
+)
+
+# Ordre de publication des tables dans la transaction
+BUNDLE_TABLE_ORDER = ("etudiants", "mobilite", "insertion")
+
+
+def _validate_to_spool(
+    table: str,
+    path: str,
+    file_format: str,
+    sheet: Optional[str],
+    spool_path: str,
+) -> Dict[str, Any]:
+    """
+    Exécuté dans un processus du pool: lit et valide un fichier sans accès base,
+    et écrit les lignes valides (numéro de ligne + colonnes + row_hash + search_document)
+    dans un CSV de spool.
+    """
+    service = CsvImportService()
+    columns = service._get_expected_columns(table) + [ROW_HASH_COLUMN, SEARCH_DOCUMENT_COLUMN]
+
+    try:
+        with open(path, "rb") as raw, open(spool_path, "w", encoding="utf-8", newline="") as out:
+            writer = csv.writer(out)
+
+            def _sink(line: int, payload: Dict[str, Any]) -> None:
+                # None -> champ vide (les valeurs normalisées ne sont jamais "")
+                writer.writerow([line] + [payload.get(col) for col in columns])
+
+            report = service.import_stream(
+                None,
+                table,
+                raw,
+                file_format=file_format,
+                sheet=sheet,
+                dry_run=True,
+                row_sink=_sink,
+                # PK en double: la dernière ligne l'emporte (DISTINCT ON de copy_merge), comme l'import simple
+                reject_duplicate_pks=False,
+            )
+    except HTTPException as e:
+        # erreur de structure (en-têtes, fichier vide...): le fichier entier est rejeté
+        return {"status": "rejected", "table": table, "detail": e.detail}
+
+    report["columns"] = columns
+    return report
+
+
+def _read_spool(spool_path: str, columns: List[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(spool_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            payload = {col: (val if val != "" else None) for col, val in zip(columns, row[1:])}
+            yield int(row[0]), payload
+
+
+class ImportBundleService:
+    """
+    Import groupé de plusieurs tables (ex: etudiants + mobilite + insertion):
+      1. chaque fichier est lu et validé en parallèle dans un pool de processus (sans base)
+      2. les lignes valides sont chargées par COPY en staging puis fusionnées,
+         toutes les tables dans UNE transaction: les indicateurs ne voient jamais
+         un chargement à moitié fait.
+    """
+
+    def __init__(self):
+        self.import_service = CsvImportService()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # créé à la première utilisation; "spawn" évite de forker un serveur multi-thread
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=settings.IMPORT_BUNDLE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _table_for_filename(self, filename: str) -> str:
+        """Table cible déduite du nom de fichier: etudiants.csv, mobilite_2025.xlsx..."""
+        stem = _normalize_header(os.path.splitext(os.path.basename(filename))[0])
+        for table in self.import_service.metadata.get_tables():
+            if stem == table or stem.startswith(f"{table}_"):
+                return table
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Impossible de déduire la table du fichier '{filename}': le nom doit commencer "
+                f"par une table connue {self.import_service.metadata.get_tables()}"
+            ),
+        )
+
+    def _format_for_filename(self, filename: str) -> str:
+        ext = os.path.splitext(filename)[1].lower().lstrip(".")
+        if ext not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Format non supporté pour '{filename}'. Formats autorisés: {list(IMPORT_FORMATS)} (ou .zip)",
+            )
+        return ext
+
+    def _collect_sources(self, files: List[UploadFile], workdir: str) -> Dict[str, Dict[str, str]]:
+        """Copie les fichiers (et le contenu des ZIP) sur disque: {table: {filename, path, format}}."""
+        sources: Dict[str, Dict[str, str]] = {}
+
+        def _add(filename: str, copy_to) -> None:
+            table = self._table_for_filename(filename)
+            file_format = self._format_for_filename(filename)
+            if table in sources:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Plusieurs fichiers pour la table '{table}': '{sources[table]['filename']}' et '{filename}'",
+                )
+            path = os.path.join(workdir, f"{table}.{file_format}")
+            with open(path, "wb") as out:
+                copy_to(out)
+            sources[table] = {"filename": filename, "path": path, "format": file_format}
+
+        for upload in files:
+            filename = upload.filename or ""
+            if filename.lower().endswith(".zip"):
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Archive ZIP invalide: '{filename}'",
+                    )
+                with archive:
+                    for member in archive.infolist():
+                        name = os.path.basename(member.filename)
+                        if member.is_dir() or not name or member.filename.startswith("__MACOSX/"):
+                            continue
+                        _add(name, lambda out, m=member: shutil.copyfileobj(archive.open(m), out, 1024 * 1024))
+            else:
+                _add(filename, lambda out, u=upload: shutil.copyfileobj(u.file, out, 1024 * 1024))
+
+        if not sources:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Aucun fichier à importer.",
+            )
+        return sources
+
+    def import_bundle(
+        self,
+        db: Session,
+        files: List[UploadFile],
+        sheet: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        workdir = tempfile.mkdtemp(prefix="import_bundle_")
+        try:
+            sources = self._collect_sources(files, workdir)
+
+            # 1. lecture + validation en parallèle (aucun accès base)
+            pool = self._get_pool()
+            futures = {
+                table: pool.submit(
+                    _validate_to_spool,
+                    table,
+                    src["path"],
+                    src["format"],
+                    sheet,
+                    os.path.join(workdir, f"{table}.spool.csv"),
+                )
+                for table, src in sources.items()
+            }
+            reports = {table: future.result() for table, future in futures.items()}
+
+            rejected = []
+            for table, report in reports.items():
+                filename = sources[table]["filename"]
+                if report["status"] == "rejected":
+                    rejected.append({"table": table, "filename": filename, "detail": report["detail"]})
+                    continue
+                valid = report["valid_rows"]
+                # fichier sans aucune ligne valide refusé
+                if valid == 0:
+                    rejected.append({
+                        "table": table,
+                        "filename": filename,
+                        "detail": "Aucune ligne valide",
+                        "errors": report["errors"][:10],
+                    })
+                # même seuil que l'import simple (10%)
+                elif report["error_count"] > valid * 0.1:
+                    rejected.append({
+                        "table": table,
+                        "filename": filename,
+                        "detail": f"Trop d'erreurs ({report['error_count']} erreurs pour {valid} lignes valides)",
+                        "errors": report["errors"][:10],
+                    })
+            if rejected:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail={"message": "Import groupé refusé: aucune table modifiée.", "files": rejected},
+                )
+
+            # 2. staging + publication de toutes les tables en une seule transaction
+            counts: Dict[str, Dict[str, int]] = {}
+            try:
+                for table in BUNDLE_TABLE_ORDER:
+                    if table not in reports:
+                        continue
+                    _, dao = self.import_service._get_pk_and_dao(table)
+                    columns = reports[table]["columns"]
+                    counts[table] = dao.copy_merge(
+                        db,
+                        columns,
+                        _read_spool(os.path.join(workdir, f"{table}.spool.csv"), columns),
+                    )
+                    if counts[table]["inserted"] or counts[table]["updated"]:
+                        dao.versions.bump(db, table)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Erreur lors de la publication (aucune table modifiée): {_build_sqlalchemy_error_detail(e)}",
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        tables = []
+        for table in BUNDLE_TABLE_ORDER:
+            if table not in reports:
+                continue
+            report = reports[table]
+            inserted = counts[table]["inserted"]
+            updated = counts[table]["updated"]
+            tables.append({
+                "table": table,
+                "filename": sources[table]["filename"],
+                "format": report["format"],
+                "delimiter": report["delimiter"],
+                "sheet": report["sheet"],
+                "processed_rows": report["valid_rows"],
+                "inserted_rows": inserted,
+                "updated_rows": updated,
+                "unchanged_rows": report["valid_rows"] - inserted - updated,
+                "ignored_columns": report["ignored_columns"],
+                "errors": report["errors"][:10],
+                "error_count": report["error_count"],
+            })
+        # vues matérialisées des indicateurs qui lisent une table modifiée
+        changed = [table for table, done in counts.items() if done["inserted"] or done["updated"]]
+        refreshed_views = self.import_service.materialized.refresh_for_tables(db, changed)
+
+        return {"status": "ok", "tables": tables, "refreshed_views": refreshed_views}
@@ -0,0 +1,261 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from fastapi import HTTPException, status, UploadFile
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User, UserRole
+from app.services.csv_import_service import CsvImportService, ImportCancelled, ImportProgress
+
+
+class _CountingReader:
+    """Enveloppe un fichier binaire et compte les octets lus (pour l'ETA)."""
+
+    def __init__(self, raw: BinaryIO, progress: ImportProgress):
+        self._raw = raw
+        self._progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._raw.read(size)
+        self._progress.bytes_read += len(chunk)
+        return chunk
+
+    # openpyxl (XLSX = zip) a besoin d'un fichier seekable
+    def seek(self, offset: int, whence: int = 0) -> int:
+        position = self._raw.seek(offset, whence)
+        # retour arrière (ex: validation de l'encodage CSV): octets lus = position courante
+        self._progress.bytes_read = position
+        return position
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+
+class ImportJob:
+    """Un import exécuté en arrière-plan, suivi par son id."""
+
+    def __init__(
+        self,
+        table: str,
+        filename: str,
+        mode: str,
+        batch_size: Optional[int],
+        path: str,
+        created_by: int,
+        file_format: str = "csv",
+        sheet: Optional[str] = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.table = table
+        self.filename = filename
+        self.file_format = file_format
+        self.sheet = sheet
+        self.mode = mode
+        self.batch_size = batch_size
+        self.path = path
+        self.created_by = created_by
+        self.total_bytes = os.path.getsize(path)
+
+        self.status = "pending"  # pending | running | completed | failed | cancelled
+        self.progress = ImportProgress()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Any] = None
+
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._started_monotonic: Optional[float] = None
+        self._finished_monotonic: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self._started_monotonic is not None:
+            end = self._finished_monotonic or time.monotonic()
+            elapsed = max(end - self._started_monotonic, 0.0)
+
+        rows_per_second = round(self.progress.rows_read / elapsed, 1) if elapsed > 0 else 0.0
+
+        # ETA estimée sur la part du fichier déjà lue (le nombre de lignes n'est pas connu à l'avance).
+        # CSV seulement: openpyxl lit le zip d'un XLSX dans le désordre, les octets lus n'y disent rien.
+        eta_seconds = None
+        if (
+            self.status == "running"
+            and self.file_format == "csv"
+            and self.total_bytes > 0
+            and self.progress.bytes_read > 0
+        ):
+            fraction = min(self.progress.bytes_read / self.total_bytes, 1.0)
+            eta_seconds = round(elapsed * (1 - fraction) / fraction, 1)
+        elif self.is_finished:
+            eta_seconds = 0.0
+
+        return {
+            "id": self.id,
+            "table": self.table,
+            "filename": self.filename,
+            "format": self.file_format,
+            "sheet": self.sheet,
+            "mode": self.mode,
+            "status": self.status,
+            "created_by": self.created_by,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "rows_read": self.progress.rows_read,
+            "rows_processed": self.progress.rows_processed,
+            "error_count": self.progress.error_count,
+            "bytes_read": self.progress.bytes_read,
+            "total_bytes": self.total_bytes,
+            "elapsed_seconds": round(elapsed, 1),
+            "rows_per_second": rows_per_second,
+            "eta_seconds": eta_seconds,
+            "cancel_requested": self.progress.cancel_requested,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class ImportJobService:
+    """
+    Imports exécutés dans un pool de threads : la requête HTTP rend la main
+    immédiatement avec l'id du job, l'avancement se consulte ensuite par polling.
+    Les jobs sont gardés en mémoire du processus (les plus anciens terminés sont purgés).
+    """
+
+    def __init__(self):
+        self.import_service = CsvImportService()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.IMPORT_JOB_WORKERS,
+            thread_name_prefix="import-job",
+        )
+        self._jobs: Dict[str, ImportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        table: str,
+        file: UploadFile,
+        current_user: User,
+        mode: str = "batch",
+        batch_size: Optional[int] = None,
+        file_format: str = "csv",
+        sheet: Optional[str] = None,
+    ) -> ImportJob:
+        if table not in self.import_service.metadata.get_tables():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Table inconnue '{table}'. Tables autorisées: {self.import_service.metadata.get_tables()}",
+            )
+
+        # L'UploadFile est fermé à la fin de la requête : copie en flux vers un fichier temporaire
+        suffix = os.path.splitext(file.filename or "")[1] or f".{file_format}"
+        with tempfile.NamedTemporaryFile(prefix="import_", suffix=suffix, delete=False) as tmp:
+            shutil.copyfileobj(file.file, tmp, 1024 * 1024)
+            path = tmp.name
+
+        job = ImportJob(
+            table=table,
+            filename=file.filename or "",
+            mode=mode,
+            batch_size=batch_size,
+            path=path,
+            created_by=current_user.id,
+            file_format=file_format,
+            sheet=sheet,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ImportJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.now()
+        job._started_monotonic = time.monotonic()
+
+        db = SessionLocal()
+        try:
+            with open(job.path, "rb") as raw:
+                job.progress.check_cancelled()
+                job.result = self.import_service.import_stream(
+                    db,
+                    job.table,
+                    _CountingReader(raw, job.progress),
+                    mode=job.mode,
+                    batch_size=job.batch_size,
+                    progress=job.progress,
+                    file_format=job.file_format,
+                    sheet=job.sheet,
+                )
+            job.status = "completed"
+        except ImportCancelled:
+            db.rollback()
+            job.status = "cancelled"
+        except HTTPException as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = e.detail
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            db.close()
+            job.finished_at = datetime.now()
+            job._finished_monotonic = time.monotonic()
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.is_finished]
+        excess = len(finished) - settings.IMPORT_JOB_HISTORY
+        if excess > 0:
+            finished.sort(key=lambda j: j.created_at)
+            for j in finished[:excess]:
+                self._jobs.pop(j.id, None)
+
+    def list_jobs(self) -> List[ImportJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def get_job(self, job_id: str) -> ImportJob:
+        job = self._jobs.get(job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job d'import introuvable",
+            )
+        return job
+
+    def cancel_job(self, job_id: str, current_user: User) -> ImportJob:
+        job = self.get_job(job_id)
+        if job.created_by != current_user.id and current_user.role != UserRole.ADMIN:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Seul l'auteur de l'import ou un administrateur peut l'annuler",
+            )
+        if job.is_finished:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job déjà terminé (statut: {job.status})",
+            )
+        job.progress.cancel()
+        return job
@@ -1,13 +1,34 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from typing import Dict, List, Any, Optional
+from app.core.indicator_cache import indicator_cache, spec_hash
 from app.dao.indicator_dao import IndicatorDao
-from app.utils.sql_translator import JsonToSqlTranslator
+from app.dao.metadata_dao import MetadataDao
+from app.dao.prepared_statements import execute_prepared
+from app.dao.table_version_dao import TableVersionDao
+from app.models.indicator import Indicator
+from app.services.materialized_indicator_service import MaterializedIndicatorService
+from app.services.report_planner import ReportPlanner
+from app.utils.sql_translator import TRANSLATOR_VERSION, JsonToSqlTranslator, render_sql
 
 class IndicatorExecutionService:
     def __init__(self):
         self.dao = IndicatorDao()
+        self.metadata = MetadataDao()
+        self.versions = TableVersionDao()
+        self.planner = ReportPlanner()
+        self.materialized = MaterializedIndicatorService()
+
+    def _cache_key(self, db: Session, spec_digest: str, tables: List[str]) -> Optional[str]:
+        """
+        Clé de cache du résultat, ou None si l'indicateur lit une table dont
+        les modifications ne sont pas versionnées (résultat jamais mis en cache).
+        """
+        if not indicator_cache.enabled:
+            return None
+        if not tables or any(table not in self.metadata.get_tables() for table in tables):
+            return None
+        return indicator_cache.make_key(spec_digest, self.versions.get_versions(db, tables))
 
     def execute_indicator(self, db: Session, indicator_id: int) -> Dict[str, Any]:
         """
@@ -39,7 +60,107 @@ class IndicatorExecutionService:
                 detail="Structure d'indicateur invalide"
             )
 
-        return self._execute_indicator_json(db, indicator.indicator, indicator_id, indicator.title)
+        compiled = self._compiled(indicator)
+
+        # Indicateur matérialisé: lecture de sa vue (rafraîchie après chaque import),
+        # seulement si elle a été construite depuis la compilation du JSON actuel
+        if indicator.materialized and compiled is not None:
+            from_view = self.materialized.read(db, indicator)
+            if from_view is not None:
+                return self._build_response(from_view, indicator_id, indicator.title)
+
+        return self._execute_indicator_json(
+            db, indicator.indicator, indicator_id, indicator.title, compiled
+        )
+
+    def _compiled(self, indicator: Indicator) -> Optional[Dict[str, Any]]:
+        """
+        Compilation enregistrée à jour (pas de traduction JSON -> SQL), sinon None.
+        À jour = même version du traducteur et même empreinte que le JSON actuel
+        (le JSON a pu être modifié sans recompilation, ex: script de conversion).
+        """
+        if (
+            indicator.compiled_sql
+            and indicator.spec_hash
+            and indicator.translator_version == TRANSLATOR_VERSION
+            and indicator.spec_hash == spec_hash(indicator.indicator)
+        ):
+            return {
+                "sql": indicator.compiled_sql,
+                "params": indicator.compiled_params or {},
+                "tables": indicator.referenced_tables or [],
+                "spec_hash": indicator.spec_hash,
+            }
+        return None
+
+    def execute_fused(self, db: Session, indicators: List[Indicator]) -> Dict[int, Dict[str, Any]]:
+        """
+        Exécution groupée des indicateurs d'un rapport (cf. ReportPlanner): les indicateurs
+        scalaires d'une même table sont calculés en un seul parcours.
+        Retourne {indicator_id: résultat} (même forme que execute_indicator) pour les
+        indicateurs traités ici ; les autres sont à exécuter avec execute_indicator.
+        Une requête fusionnée en erreur est ignorée: ses indicateurs seront exécutés seuls.
+        Ne lève pas d'exception: un indicateur mal formé est simplement laissé à execute_indicator.
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        pending = []
+        cache_keys: Dict[int, Optional[str]] = {}
+        for indicator in indicators:
+            compiled = self._compiled(indicator)
+            spec = indicator.indicator
+            # les indicateurs matérialisés sont lus dans leur vue (execute_indicator)
+            if not isinstance(spec, dict) or indicator.materialized:
+                continue
+            try:
+                tables = compiled["tables"] if compiled else JsonToSqlTranslator(spec).referenced_tables()
+                digest = compiled["spec_hash"] if compiled else spec_hash(spec)
+                cache_keys[indicator.id] = self._cache_key(db, digest, tables)
+            except Exception:
+                db.rollback()
+                cache_keys[indicator.id] = None
+
+            cached = indicator_cache.get(cache_keys[indicator.id]) if cache_keys[indicator.id] else None
+            if cached is not None:
+                results[indicator.id] = self._build_response(cached, indicator.id, indicator.title)
+            else:
+                pending.append((indicator, compiled))
+
+        by_id = {indicator.id: (indicator, compiled) for indicator, compiled in pending}
+        try:
+            fused_queries = self.planner.plan([(indicator.id, indicator.indicator) for indicator, _ in pending])
+        except Exception:
+            # planification impossible: tous les indicateurs restants sont exécutés seuls
+            return results
+
+        for fused in fused_queries:
+            try:
+                result = execute_prepared(db, fused.sql, fused.params)
+                row = dict(zip(result.keys(), result.fetchone()))
+            except Exception:
+                db.rollback()
+                continue
+
+            for indicator_id, (columns, rows) in fused.split(row).items():
+                indicator, compiled = by_id[indicator_id]
+                try:
+                    if compiled:
+                        display_sql = render_sql(compiled["sql"], compiled["params"])
+                    else:
+                        display_sql = JsonToSqlTranslator(indicator.indicator).to_sql()
+                except Exception:
+                    # exécuté seul: son erreur y sera rapportée
+                    continue
+                computed = {
+                    "sql": display_sql,
+                    "columns": columns,
+                    "rows": rows,
+                    "row_count": len(rows),
+                }
+                if cache_keys.get(indicator_id):
+                    indicator_cache.put(cache_keys[indicator_id], computed)
+                results[indicator_id] = self._build_response(computed, indicator_id, indicator.title)
+
+        return results
 
     def execute_indicator_json(self, db: Session, indicator_json: Dict[str, Any], title: str = "Indicateur personnalisé") -> Dict[str, Any]:
         """
@@ -78,15 +199,40 @@ class IndicatorExecutionService:
         db: Session, 
         indicator_json: Dict[str, Any], 
         indicator_id: Optional[int] = None,
-        indicator_title: str = "Indicateur"
+        indicator_title: str = "Indicateur",
+        compiled: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Méthode interne pour exécuter un indicateur JSON.
+        compiled: compilation enregistrée {"sql", "params", "tables", "spec_hash"} (None = traduire le JSON).
+        La requête est exécutée préparée (PREPARE / EXECUTE, littéraux en paramètres liés).
+        Le résultat est mis en cache jusqu'à la prochaine modification d'une des tables lues.
         """
+        translator = JsonToSqlTranslator(indicator_json)
+        if compiled is None:
+            compiled = {
+                "sql": None,
+                "params": None,
+                "tables": translator.referenced_tables(),
+                "spec_hash": spec_hash(indicator_json),
+            }
+        try:
+            cache_key = self._cache_key(db, compiled["spec_hash"], compiled["tables"])
+        except Exception:
+            # pas de cache possible (ex: table_versions absente): exécution normale
+            db.rollback()
+            cache_key = None
+
+        cached = indicator_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return self._build_response(cached, indicator_id, indicator_title)
+
         # Convertir l'indicator JSON en SQL
         try:
-            translator = JsonToSqlTranslator(indicator_json)
-            sql_query = translator.to_sql()
+            if compiled["sql"]:
+                sql_query, params = compiled["sql"], compiled["params"]
+            else:
+                sql_query, params = translator.to_sql_params()
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -95,25 +241,19 @@ class IndicatorExecutionService:
 
         # Exécuter la requête SQL
         try:
-            result = db.execute(text(sql_query))
+            result = execute_prepared(db, sql_query, params)
             columns = list(result.keys())
             rows = result.fetchall()
             
             # Convertir les Row en dictionnaires
             rows_data = [dict(zip(columns, row)) for row in rows]
             
-            response = {
-                "sql": sql_query,
+            computed = {
+                "sql": render_sql(sql_query, params),
                 "columns": columns,
                 "rows": rows_data,
                 "row_count": len(rows_data),
-                "indicator_title": indicator_title
             }
-            
-            if indicator_id is not None:
-                response["indicator_id"] = indicator_id
-            
-            return response
         except Exception as e:
             # Rollback en cas d'erreur pour éviter les transactions abortées
             db.rollback()
@@ -125,3 +265,19 @@ class IndicatorExecutionService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erreur lors de l'exécution SQL: {error_msg}"
             )
+
+        if cache_key:
+            indicator_cache.put(cache_key, computed)
+        return self._build_response(computed, indicator_id, indicator_title)
+
+    def _build_response(
+        self,
+        computed: Dict[str, Any],
+        indicator_id: Optional[int],
+        indicator_title: str,
+    ) -> Dict[str, Any]:
+        response = dict(computed)
+        response["indicator_title"] = indicator_title
+        if indicator_id is not None:
+            response["indicator_id"] = indicator_id
+        return response
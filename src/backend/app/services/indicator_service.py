@@ -3,14 +3,17 @@ from sqlalchemy.orm import Session
 from app.dao.indicator_dao import IndicatorDao
 from app.schemas.indicator import IndicatorCreate, IndicatorUpdate
 from app.models.user import User
+from app.services.materialized_indicator_service import MaterializedIndicatorService
+from app.utils.sql_translator import compile_indicator
 
 
 class IndicatorService:
     def __init__(self):
         self.dao = IndicatorDao()
+        self.materialized = MaterializedIndicatorService()
 
-    def list_indicators(self, db: Session, skip: int = 0, limit: int = 100):
-        return self.dao.get_all(db, skip=skip, limit=limit)
+    def list_indicators(self, db: Session, skip: int = 0, limit: int = 100, table: str | None = None):
+        return self.dao.get_all(db, skip=skip, limit=limit, table=table)
 
     def get_indicator(self, db: Session, indicator_id: int):
         db_indicator = self.dao.get_by_id(db, indicator_id)
@@ -21,25 +24,72 @@ class IndicatorService:
             )
         return db_indicator
 
+    def _build_view(self, db: Session, db_indicator):
+        """
+        Crée la vue matérialisée dans la transaction en cours (DDL transactionnelle):
+        en cas d'échec tout est annulé (indicateur ni créé ni modifié) et 400 est levée.
+        """
+        if not db_indicator.compiled_sql:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Indicateur non traduisible en SQL: il ne peut pas être matérialisé"
+            )
+        try:
+            self.materialized.build(db, db_indicator, commit=False)
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Vue matérialisée impossible pour cet indicateur: {str(e)[:300]}"
+            )
+
     def create_indicator(self, db: Session, data: IndicatorCreate, current_user: User):
-        return self.dao.create(
+        compilation = compile_indicator(data.indicator)
+        # indicateur et vue enregistrés ensemble: un seul commit
+        db_indicator = self.dao.create(
             db,
             title=data.title,
             description=data.description,
             indicator=data.indicator,
-            created_by=current_user.id
+            created_by=current_user.id,
+            materialized=data.materialized,
+            commit=False,
+            **compilation
         )
+        if db_indicator.materialized:
+            self._build_view(db, db_indicator)
+        db.commit()
+        db.refresh(db_indicator)
+        return db_indicator
 
     def update_indicator(self, db: Session, indicator_id: int, data: IndicatorUpdate):
         db_indicator = self.get_indicator(db, indicator_id)
-        return self.dao.update(
+        if data.indicator is not None:
+            # recompilé une fois ici plutôt qu'à chaque exécution
+            self.dao.save_compilation(db, db_indicator, compile_indicator(data.indicator), commit=False)
+        was_materialized = db_indicator.materialized
+        # modifications et vue enregistrées ensemble: un seul commit
+        db_indicator = self.dao.update(
             db,
             db_indicator,
+            commit=False,
             title=data.title,
             description=data.description,
-            indicator=data.indicator
+            indicator=data.indicator,
+            materialized=data.materialized
         )
 
+        if db_indicator.materialized and (data.indicator is not None or not was_materialized):
+            self._build_view(db, db_indicator)
+        elif was_materialized and not db_indicator.materialized:
+            self.materialized.views.drop(db, db_indicator.id)
+        db.commit()
+        db.refresh(db_indicator)
+        return db_indicator
+
     def delete_indicator(self, db: Session, indicator_id: int):
         db_indicator = self.get_indicator(db, indicator_id)
+        if db_indicator.materialized:
+            self.materialized.views.drop(db, db_indicator.id)
         self.dao.delete(db, db_indicator)
@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.dao.indicator_dao import IndicatorDao
+from app.dao.materialized_view_dao import MaterializedViewDao, view_name
+from app.dao.metadata_dao import MetadataDao
+from app.dao.table_version_dao import TableVersionDao
+from app.models.indicator import Indicator
+from app.utils.sql_translator import JsonToSqlTranslator, render_sql
+
+
+class MaterializedIndicatorService:
+    """
+    Indicateurs adossés à une vue matérialisée (indicator.materialized):
+    la vue est créée à l'enregistrement, lue à l'exécution et rafraîchie
+    (REFRESH ... CONCURRENTLY) après chaque import d'une table dont elle dépend.
+    Les versions des tables au dernier rafraîchissement sont gardées sur l'indicateur
+    (materialized_versions): toute autre modification (suppression, script...) incrémente
+    table_versions et la vue est alors rafraîchie à la lecture suivante.
+    """
+
+    def __init__(self):
+        self.dao = IndicatorDao()
+        self.views = MaterializedViewDao()
+        self.metadata = MetadataDao()
+        self.versions = TableVersionDao()
+
+    def _table_versions(self, db: Session, indicator: Indicator) -> Dict[str, int]:
+        """Versions courantes des tables versionnées lues par l'indicateur."""
+        tables = [t for t in (indicator.referenced_tables or []) if t in self.metadata.get_tables()]
+        return self.versions.get_versions(db, tables) if tables else {}
+
+    def _refresh(self, db: Session, indicator: Indicator) -> None:
+        """
+        Rafraîchit la vue et enregistre les versions vues, puis commit.
+        Versions lues AVANT le rafraîchissement: au pire la vue est plus récente
+        que ses versions (un rafraîchissement de trop), jamais l'inverse.
+        """
+        versions = self._table_versions(db, indicator)
+        self.views.refresh(db, indicator.id)
+        indicator.materialized_versions = versions
+        db.commit()
+
+    def _indicator_sql(self, indicator: Indicator) -> str:
+        """SQL de l'indicateur, littéraux inlinés (une vue n'a pas de paramètres)."""
+        if indicator.compiled_sql:
+            return render_sql(indicator.compiled_sql, indicator.compiled_params or {})
+        return JsonToSqlTranslator(indicator.indicator).to_sql()
+
+    def build(self, db: Session, indicator: Indicator, commit: bool = True) -> None:
+        """(Re)crée la vue de l'indicateur et commit (commit=False: dans la transaction de l'appelant)."""
+        versions = self._table_versions(db, indicator)
+        order_by = JsonToSqlTranslator(indicator.indicator).ordering_columns()
+        self.views.create(db, indicator.id, self._indicator_sql(indicator), order_by=order_by)
+        indicator.materialized_versions = versions
+        if commit:
+            db.commit()
+
+    def drop(self, db: Session, indicator_id: int) -> None:
+        self.views.drop(db, indicator_id)
+        db.commit()
+
+    def read(self, db: Session, indicator: Indicator) -> Optional[Dict[str, Any]]:
+        """
+        Résultat de l'indicateur lu dans sa vue (même forme qu'une exécution),
+        ou None si la vue n'est pas disponible (exécution normale).
+        Une vue en retard sur la version d'une de ses tables est d'abord rafraîchie.
+        """
+        try:
+            if indicator.materialized_versions != self._table_versions(db, indicator):
+                self._refresh(db, indicator)
+            columns, rows = self.views.read(db, indicator.id)
+        except Exception:
+            db.rollback()
+            return None
+        return {
+            "sql": self._indicator_sql(indicator),
+            "columns": columns,
+            "rows": rows,
+            "row_count": len(rows),
+        }
+
+    def refresh_for_tables(self, db: Session, tables: List[str]) -> List[str]:
+        """
+        Rafraîchit les vues des indicateurs qui lisent l'une des tables (après commit de l'import).
+        Une vue absente est recréée ; une vue en erreur est ignorée (l'import reste valide).
+        Retourne les noms des vues rafraîchies.
+        """
+        if not tables:
+            return []
+        try:
+            indicators = self.dao.get_materialized(db, tables)
+        except Exception:
+            # colonnes de matérialisation absentes (migration non appliquée)
+            db.rollback()
+            return []
+
+        refreshed = []
+        for indicator in indicators:
+            try:
+                self._refresh(db, indicator)
+            except Exception:
+                db.rollback()
+                try:
+                    self.build(db, indicator)
+                except Exception:
+                    db.rollback()
+                    continue
+            refreshed.append(view_name(indicator.id))
+        return refreshed
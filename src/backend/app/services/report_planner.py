@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.sql_translator import JsonToSqlTranslator
+
+# Fonctions d'agrégation qui acceptent une clause FILTER
+_FILTERABLE_AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+
+class FusedQuery:
+    """
+    Une requête qui calcule plusieurs indicateurs scalaires en un seul parcours de table.
+    members: [(indicator_id, [(alias SQL, titre de colonne)])] pour redécouper la ligne résultat.
+    """
+
+    def __init__(self, table: str, sql: str, params: Dict[str, Any], members: List[Tuple[int, List[Tuple[str, str]]]]):
+        self.table = table
+        self.sql = sql
+        self.params = params
+        self.members = members
+
+    def split(self, row: Dict[str, Any]) -> Dict[int, Tuple[List[str], List[Dict[str, Any]]]]:
+        """Ligne de la requête fusionnée -> {indicator_id: (colonnes, lignes)} comme une exécution seule."""
+        results = {}
+        for indicator_id, columns in self.members:
+            results[indicator_id] = (
+                [title for _, title in columns],
+                [{title: row[alias] for alias, title in columns}],
+            )
+        return results
+
+
+class ReportPlanner:
+    """
+    Planification de l'exécution d'un rapport: les indicateurs « scalaires » (seulement
+    des agrégations, sans GROUP BY) sur une même table sont fusionnés en une requête,
+    chaque indicateur devenant AGG(...) FILTER (WHERE conditions de l'indicateur).
+    Les autres indicateurs restent exécutés un par un.
+    """
+
+    def _fusable_table(self, spec: Any) -> Optional[str]:
+        """Table de l'indicateur s'il peut être fusionné, sinon None."""
+        if not isinstance(spec, dict) or not isinstance(spec.get("sujet") or {}, dict):
+            return None
+        tables = (spec.get("sujet") or {}).get("tables") or []
+        columns = spec.get("colonnes") or []
+        if not isinstance(tables, list) or len(tables) != 1 or not isinstance(columns, list) or not columns:
+            return None
+        for col in columns:
+            expr = col.get("expr") if isinstance(col, dict) else None
+            if not isinstance(expr, dict) or col.get("type") != "aggregation" or "agg" not in expr:
+                return None
+            if str(expr.get("agg", "")).lower() not in _FILTERABLE_AGGREGATES:
+                return None
+            # un sous-sujet avec tables devient une sous-requête: pas de FILTER possible
+            subject = expr.get("subject") or {}
+            if not isinstance(subject, dict) or subject.get("tables"):
+                return None
+        return tables[0] if isinstance(tables[0], str) else None
+
+    def plan(self, indicators: List[Tuple[int, Dict[str, Any]]]) -> List[FusedQuery]:
+        """
+        indicators: [(indicator_id, JSON de l'indicateur)] du rapport.
+        Retourne les requêtes fusionnées (groupes d'au moins deux indicateurs).
+        Un indicateur dont la traduction échoue est retiré de son groupe: exécuté seul,
+        son erreur est rapportée pour lui seul.
+        """
+        groups: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for indicator_id, spec in indicators:
+            table = self._fusable_table(spec)
+            if table is not None:
+                groups.setdefault(table, []).append((indicator_id, spec))
+
+        planned: List[FusedQuery] = []
+        for table, members in groups.items():
+            if len(members) < 2:
+                continue
+            translated = []
+            for indicator_id, spec in members:
+                # préfixe propre à chaque indicateur: paramètres liés sans collision
+                translator = JsonToSqlTranslator(spec, param_prefix=f"i{len(translated)}_")
+                try:
+                    translated.append((indicator_id, translator.filtered_aggregations()))
+                except Exception:
+                    continue
+            if len(translated) >= 2:
+                planned.append(self._fuse(table, translated))
+        return planned
+
+    def _fuse(
+        self,
+        table: str,
+        members: List[Tuple[int, Tuple[List[Tuple[str, str]], Optional[str], Dict[str, Any]]]],
+    ) -> FusedQuery:
+        """members: [(indicator_id, filtered_aggregations() traduit avec le préfixe i{idx}_)]."""
+        select_clauses: List[str] = []
+        member_conditions: List[Optional[str]] = []
+        params: Dict[str, Any] = {}
+        planned: List[Tuple[int, List[Tuple[str, str]]]] = []
+
+        for idx, (indicator_id, (expressions, where, member_params)) in enumerate(members):
+            member_conditions.append(where)
+            params.update(member_params)
+
+            columns: List[Tuple[str, str]] = []
+            for col_idx, (expr, title) in enumerate(expressions):
+                alias = f"i{idx}_c{col_idx}"
+                select_clauses.append(f'{expr} AS "{alias}"')
+                columns.append((alias, title))
+            planned.append((indicator_id, columns))
+
+        sql = "SELECT\n  " + ",\n  ".join(select_clauses) + f"\nFROM {table}"
+        # si chaque indicateur filtre, les lignes qui ne servent à aucun sont écartées d'emblée
+        if all(member_conditions):
+            sql += "\nWHERE " + " OR ".join(f"({where})" for where in member_conditions)
+        return FusedQuery(table, sql + ";", params, planned)
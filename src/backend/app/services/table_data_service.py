@@ -1,11 +1,18 @@
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from app.core.count_cache import count_cache
 from app.dao.metadata_dao import MetadataDao
+from app.dao.row_count_dao import RowCountDao
+from app.dao.table_version_dao import TableVersionDao
 from app.dao.insertion_dao import InsertionDao
 from app.dao.etudiants_dao import EtudiantsDao
 from app.dao.mobilite_dao import MobiliteDao
+from app.services.table_query_builder import TableQuery, TableQueryBuilder, decode_cursor, encode_cursor
+
+# Stratégies de calcul du total (paramètre count)
+COUNT_STRATEGIES = ("exact", "estimated", "cached")
 
 
 class TableDataService:
@@ -16,6 +23,9 @@ class TableDataService:
             "etudiants": EtudiantsDao(),
             "mobilite": MobiliteDao(),
         }
+        self.query_builder = TableQueryBuilder()
+        self.row_counts = RowCountDao()
+        self.versions = TableVersionDao()
 
     def _get_dao(self, table: str):
         allowed = self.metadata.get_tables()
@@ -32,6 +42,31 @@ class TableDataService:
             )
         return dao
 
+    def _count_total(self, db: Session, query: TableQuery, count: str) -> Tuple[int, bool]:
+        """
+        Total des lignes de la requête (avec filtres) selon la stratégie:
+          - exact: COUNT(*) à chaque appel
+          - estimated: statistiques du planificateur, instantané mais approché
+          - cached: COUNT(*) exact mis en cache jusqu'au prochain import de la table
+        Retourne (total, estimé ou non).
+        """
+        if count not in COUNT_STRATEGIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Stratégie de comptage inconnue '{count}'. Valeurs autorisées: {list(COUNT_STRATEGIES)}",
+            )
+        if count == "estimated":
+            return self.row_counts.estimate(db, query.table, query.where_clause, query.params), True
+        if count == "cached":
+            version = self.versions.get_versions(db, [query.table])[query.table]
+            key = count_cache.make_key(query.table, version, query.where_clause, query.params)
+            total = count_cache.get(key)
+            if total is None:
+                total = db.execute(text(query.count_sql()), query.params).scalar()
+                count_cache.put(key, total)
+            return total, False
+        return db.execute(text(query.count_sql()), query.params).scalar(), False
+
     def get_table_data(
         self,
         db: Session,
@@ -40,78 +75,163 @@ class TableDataService:
         limit: int = 50,
         search: Optional[str] = None,
         sort_by: Optional[str] = None,
-        sort_order: str = "asc"
+        sort_order: str = "asc",
+        filters: Optional[List[str]] = None,
+        pagination: str = "offset",
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        projection: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
-        Récupère les données d'une table avec pagination, recherche et tri au niveau SQL.
+        Récupère les données d'une table avec pagination, recherche, filtres et tri au niveau SQL.
         Optimisé pour les gros volumes de données.
+
+        pagination="cursor": pagination par clé (tri + clé primaire), voir _get_cursor_page.
+        count: calcul du total (exact, estimated, cached), voir _count_total.
+        projection: colonnes renvoyées (columns=a,b), toutes par défaut.
         """
-        dao = self._get_dao(table)
+        self._get_dao(table)
         columns = self.metadata.get_columns(table)
-        
-        # Construire la requête SQL avec pagination, recherche et tri
-        base_query = f'SELECT * FROM {table}'
-        where_clauses = []
-        params = {}
-        
-        # Recherche (si fournie) - recherche dans toutes les colonnes textuelles
-        # Mais seulement dans les colonnes qui existent réellement dans la table
-        if search:
-            search_conditions = []
-            # Vérifier quelles colonnes existent réellement dans la table
-            existing_cols_query = text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = :table_name
-            """)
-            existing_cols_result = db.execute(existing_cols_query, {"table_name": table})
-            existing_column_names = {row[0] for row in existing_cols_result}
-            
-            # Ne rechercher que dans les colonnes qui existent
-            for col in columns:
-                if col in existing_column_names:
-                    # Utiliser ILIKE pour recherche insensible à la casse
-                    search_conditions.append(f"{col}::text ILIKE :search_pattern")
-            
-            if search_conditions:
-                where_clauses.append(f"({' OR '.join(search_conditions)})")
-                params['search_pattern'] = f'%{search}%'
-        
-        # Construire WHERE
-        where_clause = ''
-        if where_clauses:
-            where_clause = ' WHERE ' + ' AND '.join(where_clauses)
-        
-        # Tri (si fourni)
-        order_clause = ''
-        if sort_by and sort_by in columns:
-            order_clause = f' ORDER BY {sort_by} {sort_order.upper()}'
-        else:
-            # Par défaut, trier par la première colonne (généralement la clé primaire)
-            if columns:
-                order_clause = f' ORDER BY {columns[0]} ASC'
-        
+        selected = self.query_builder.parse_columns(table, projection)
+
+        if pagination == "cursor":
+            return self._get_cursor_page(
+                db, table, columns, limit, search, sort_by, sort_order, filters, cursor, count, selected
+            )
+
+        # Même construction de requête que les exports (TableQueryBuilder)
+        query = self.query_builder.build(
+            db,
+            table,
+            columns=selected,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            filters=self.query_builder.parse_filters(filters),
+        )
+        params = dict(query.params)
+
         # Compter le total (avec filtres)
-        count_query = f'SELECT COUNT(*) FROM {table}{where_clause}'
-        total_result = db.execute(text(count_query), params)
-        total = total_result.scalar()
-        
+        total, estimated = self._count_total(db, query, count)
+
         # Requête paginée
-        paginated_query = f'{base_query}{where_clause}{order_clause} LIMIT :limit OFFSET :offset'
+        paginated_query = f"{query.select_sql()} LIMIT :limit OFFSET :offset"
         params['limit'] = limit
         params['offset'] = skip
-        
+
         # Exécuter la requête
         result = db.execute(text(paginated_query), params)
         rows_data = []
         for row in result:
             rows_data.append(dict(row._mapping))
-        
+
         return {
             "rows": rows_data,
             "total": total,
-            "columns": columns,
+            "total_estimated": estimated,
+            "columns": selected or columns,
             "page": (skip // limit) + 1 if limit > 0 else 1,
             "limit": limit,
             "skip": skip
         }
+
+    def _get_cursor_page(
+        self,
+        db: Session,
+        table: str,
+        columns: List[str],
+        limit: int,
+        search: Optional[str],
+        sort_by: Optional[str],
+        sort_order: str,
+        filters: Optional[List[str]],
+        cursor: Optional[str],
+        count: str = "exact",
+        selected: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Page en pagination par clé: chaque page est un parcours d'index à partir
+        de la clé (valeur de tri, clé primaire) du curseur, quelle que soit la profondeur,
+        et les lignes ne se décalent pas pendant un import.
+        next_cursor / prev_cursor sont opaques, à renvoyer tels quels (None = pas de page).
+        """
+        pk_field = self.metadata.get_primary_key(table)
+        if not pk_field:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Pagination par curseur non disponible pour la table '{table}'",
+            )
+        sort_col = sort_by if sort_by and sort_by in columns else pk_field
+        sort_order = sort_order.lower()
+
+        cursor_data = None
+        if cursor:
+            cursor_data = decode_cursor(cursor)
+            if cursor_data.get("s") != sort_col or cursor_data.get("o") != sort_order:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Curseur obtenu avec un autre tri: repartir de la première page.",
+                )
+
+        # les clés du curseur sont lues même hors projection (retirées des lignes ensuite)
+        hidden: List[str] = []
+        if selected:
+            hidden = [col for col in dict.fromkeys([sort_col, pk_field]) if col not in selected]
+
+        query = self.query_builder.build(
+            db,
+            table,
+            columns=selected + hidden if selected else None,
+            search=search,
+            sort_by=sort_col,
+            sort_order=sort_order,
+            filters=self.query_builder.parse_filters(filters),
+        )
+
+        # Compter le total (avec filtres)
+        total, estimated = self._count_total(db, query, count)
+
+        # une ligne de plus que la page: indique s'il existe une page au-delà
+        sql, params, backward = self.query_builder.keyset_sql(
+            query, sort_col, pk_field, sort_order, cursor_data, limit + 1
+        )
+        rows_data = [dict(row._mapping) for row in db.execute(text(sql), params)]
+        has_more = len(rows_data) > limit
+        rows_data = rows_data[:limit]
+        if backward:
+            rows_data.reverse()
+
+        def _cursor_for(row: Dict[str, Any], direction: str) -> str:
+            return encode_cursor({
+                "s": sort_col,
+                "o": sort_order,
+                "v": row.get(sort_col),
+                "k": row.get(pk_field),
+                "d": direction,
+            })
+
+        next_cursor = None
+        prev_cursor = None
+        if rows_data:
+            # en avant: page suivante si has_more ; en arrière: on vient forcément d'une page suivante
+            if has_more or backward:
+                next_cursor = _cursor_for(rows_data[-1], "next")
+            if (backward and has_more) or (not backward and cursor_data is not None):
+                prev_cursor = _cursor_for(rows_data[0], "prev")
+
+        for row in rows_data:
+            for col in hidden:
+                row.pop(col, None)
+
+        return {
+            "rows": rows_data,
+            "total": total,
+            "total_estimated": estimated,
+            "columns": selected or columns,
+            "limit": limit,
+            "pagination": "cursor",
+            "sort_by": sort_col,
+            "sort_order": sort_order,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
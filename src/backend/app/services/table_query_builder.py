@@ -0,0 +1,352 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.schema_catalog import schema_catalog
+from app.dao.bulk_upsert import TECHNICAL_COLUMNS
+from app.dao.metadata_dao import MetadataDao
+from app.utils.normalization import normalize_text_value
+from app.utils.search_document import SEARCH_DOCUMENT_COLUMN
+
+# Opérateurs de filtre par colonne (filter=colonne:op:valeur)
+#   eq      colonne:eq:valeur (ou colonne:valeur)
+#   in      colonne:in:v1|v2|v3
+#   range   colonne:range:min..max (bornes incluses, l'une ou l'autre facultative)
+#   isnull  colonne:isnull:true|false
+#   prefix  colonne:prefix:debut
+FILTER_OPERATORS = ("eq", "in", "range", "isnull", "prefix")
+
+_IN_SEPARATOR = "|"
+_RANGE_SEPARATOR = ".."
+_TRUE_VALUES = ("true", "1", "oui", "yes")
+_FALSE_VALUES = ("false", "0", "non", "no")
+
+_INTEGER_TYPES = ("smallint", "integer", "bigint")
+
+
+class TableQuery:
+    """Requête construite sur une table de données: projection, WHERE, ORDER BY et paramètres liés."""
+
+    def __init__(
+        self,
+        table: str,
+        columns: List[str],
+        select_clause: str,
+        where_clause: str,
+        order_clause: str,
+        params: Dict[str, Any],
+    ):
+        self.table = table
+        self.columns = columns
+        self.select_clause = select_clause
+        self.where_clause = where_clause
+        self.order_clause = order_clause
+        self.params = params
+
+    def select_sql(self) -> str:
+        return f"SELECT {self.select_clause} FROM {self.table}{self.where_clause}{self.order_clause}"
+
+    def count_sql(self) -> str:
+        return f"SELECT COUNT(*) FROM {self.table}{self.where_clause}"
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Curseur opaque (base64 url-safe d'un JSON compact)."""
+    raw = json.dumps(data, default=str, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError, binascii.Error):
+        data = None
+    if not isinstance(data, dict) or data.get("d") not in ("next", "prev") or "k" not in data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide.",
+        )
+    return data
+
+
+class TableQueryBuilder:
+    """
+    Construit les requêtes du navigateur de tables et des exports
+    (mêmes recherche, tri, filtres et projection partout).
+    Les noms de colonnes sont validés contre la nomenclature, les valeurs sont toujours liées.
+    """
+
+    def __init__(self):
+        self.metadata = MetadataDao()
+
+    def _check_table(self, table: str) -> None:
+        allowed = self.metadata.get_tables()
+        if table not in allowed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Table inconnue '{table}'. Tables autorisées: {allowed}",
+            )
+
+    def parse_columns(self, table: str, columns: Optional[List[str]]) -> Optional[List[str]]:
+        """
+        Projection demandée (columns=a,b ou columns=a&columns=b), dans l'ordre donné.
+        None si aucune projection n'est demandée.
+        """
+        if not columns:
+            return None
+        requested: List[str] = []
+        for value in columns:
+            for col in value.split(","):
+                col = col.strip()
+                if col and col not in requested:
+                    requested.append(col)
+        if not requested:
+            return None
+
+        known = self.metadata.get_columns(table)
+        unknown = [col for col in requested if col not in known]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Colonnes inconnues pour la table '{table}': {unknown}",
+            )
+        return requested
+
+    def parse_filters(self, filters: Optional[List[str]]) -> List[Tuple[str, str, str]]:
+        """
+        filter=colonne:valeur ou filter=colonne:op:valeur (répétable, combinés par AND).
+        Retourne [(colonne, op, valeur)].
+        """
+        parsed: List[Tuple[str, str, str]] = []
+        for raw in filters or []:
+            col, sep, rest = raw.partition(":")
+            if not sep or not col.strip():
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre invalide '{raw}'. Format attendu: colonne:valeur ou colonne:op:valeur",
+                )
+            op, sep, value = rest.partition(":")
+            if not sep or op not in FILTER_OPERATORS:
+                # pas d'opérateur reconnu: égalité sur toute la suite (la valeur peut contenir ':')
+                op, value = "eq", rest
+            parsed.append((col.strip(), op, value))
+        return parsed
+
+    def _filter_value(self, col: str, value: str, data_type: str) -> Any:
+        """Valeur liée d'un filtre, convertie comme les données stockées."""
+        if data_type in _INTEGER_TYPES:
+            try:
+                return int(value.strip())
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre sur '{col}': un entier est attendu, reçu {value!r}",
+                )
+        # les données sont stockées normalisées à l'import
+        return normalize_text_value(value)
+
+    def _filter_condition(
+        self,
+        col: str,
+        op: str,
+        value: str,
+        data_type: str,
+        param: str,
+        params: Dict[str, Any],
+    ) -> str:
+        """Condition SQL d'un filtre ; les valeurs sont toujours des paramètres liés."""
+        if op == "in":
+            values = [v for v in value.split(_IN_SEPARATOR) if v.strip()]
+            if not values:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre 'in' sur '{col}': au moins une valeur est attendue (v1{_IN_SEPARATOR}v2)",
+                )
+            params[param] = [self._filter_value(col, v, data_type) for v in values]
+            return f'"{col}" = ANY(:{param})'
+
+        if op == "range":
+            low, sep, high = value.partition(_RANGE_SEPARATOR)
+            if not sep or not (low.strip() or high.strip()):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre 'range' sur '{col}': format attendu min..max, min.. ou ..max",
+                )
+            conditions = []
+            if low.strip():
+                params[f"{param}_min"] = self._filter_value(col, low, data_type)
+                conditions.append(f'"{col}" >= :{param}_min')
+            if high.strip():
+                params[f"{param}_max"] = self._filter_value(col, high, data_type)
+                conditions.append(f'"{col}" <= :{param}_max')
+            return " AND ".join(conditions)
+
+        if op == "isnull":
+            flag = value.strip().lower()
+            if flag not in _TRUE_VALUES + _FALSE_VALUES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre 'isnull' sur '{col}': true ou false attendu, reçu {value!r}",
+                )
+            return f'"{col}" IS NULL' if flag in _TRUE_VALUES else f'"{col}" IS NOT NULL'
+
+        if op == "prefix":
+            prefix = normalize_text_value(value) or ""
+            # % et _ du préfixe pris littéralement
+            prefix = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params[param] = f"{prefix}%"
+            target = f'"{col}"::text' if data_type in _INTEGER_TYPES else f'"{col}"'
+            return f"{target} LIKE :{param}"
+
+        params[param] = self._filter_value(col, value, data_type)
+        return f'"{col}" = :{param}'
+
+    def build(
+        self,
+        db: Session,
+        table: str,
+        columns: Optional[List[str]] = None,
+        search: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: str = "asc",
+        filters: Optional[List[Tuple[str, str, str]]] = None,
+        default_order: bool = True,
+    ) -> TableQuery:
+        """
+        columns: projection (None = SELECT *), déjà validée par parse_columns
+        filters: filtres déjà parsés par parse_filters
+        default_order: sans sort_by, trier par la première colonne (pagination stable)
+        """
+        self._check_table(table)
+        if sort_order.lower() not in ("asc", "desc"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="sort_order doit valoir 'asc' ou 'desc'.",
+            )
+
+        table_columns = self.metadata.get_columns(table)
+        column_types = schema_catalog.get_column_types(db, table)
+
+        if columns:
+            # colonnes absentes de la base: pas lues (valeur vide à l'export)
+            select_clause = ", ".join(f'"{col}"' for col in columns if col in column_types) or "NULL"
+        elif any(col in column_types for col in TECHNICAL_COLUMNS):
+            # colonnes techniques (empreinte, document de recherche): jamais renvoyées
+            select_clause = ", ".join(f'"{col}"' for col in column_types if col not in TECHNICAL_COLUMNS)
+        else:
+            select_clause = "*"
+
+        where_clauses: List[str] = []
+        params: Dict[str, Any] = {}
+
+        # Recherche dans toutes les colonnes de la nomenclature qui existent réellement
+        if search and SEARCH_DOCUMENT_COLUMN in column_types:
+            # document maintenu à l'import: lecture de l'index trigrammes (migrations/add_search_document.py)
+            term = normalize_text_value(search)
+            if term:
+                where_clauses.append(f'"{SEARCH_DOCUMENT_COLUMN}" ILIKE :search_pattern')
+                params["search_pattern"] = f"%{term}%"
+        elif search:
+            search_conditions = [
+                f'"{col}"::text ILIKE :search_pattern'
+                for col in table_columns
+                if col in column_types
+            ]
+            if search_conditions:
+                where_clauses.append(f"({' OR '.join(search_conditions)})")
+                params["search_pattern"] = f"%{search}%"
+
+        for idx, (col, op, value) in enumerate(filters or []):
+            if col not in table_columns or col not in column_types:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Filtre sur une colonne inconnue '{col}' pour la table '{table}'",
+                )
+            where_clauses.append(
+                self._filter_condition(col, op, value, column_types[col], f"filter_{idx}", params)
+            )
+
+        where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+
+        if sort_by and sort_by in table_columns:
+            order_clause = f' ORDER BY "{sort_by}" {sort_order.upper()}'
+        elif default_order and table_columns:
+            # Par défaut, trier par la première colonne (généralement la clé primaire)
+            order_clause = f' ORDER BY "{table_columns[0]}" ASC'
+        else:
+            order_clause = ""
+
+        return TableQuery(
+            table=table,
+            columns=columns or table_columns,
+            select_clause=select_clause,
+            where_clause=where_clause,
+            order_clause=order_clause,
+            params=params,
+        )
+
+    def keyset_sql(
+        self,
+        query: TableQuery,
+        sort_col: str,
+        pk_field: str,
+        sort_order: str,
+        cursor: Optional[Dict[str, Any]],
+        limit: int,
+    ) -> Tuple[str, Dict[str, Any], bool]:
+        """
+        Requête d'une page en pagination par clé (keyset): ORDER BY (sort_col, pk)
+        et condition sur la dernière (ou première) clé vue au lieu d'un OFFSET,
+        ce qui permet un parcours d'index à n'importe quelle profondeur.
+        Les NULL de sort_col sont toujours en fin de tri (NULLS LAST).
+
+        cursor: curseur décodé {"v": valeur de tri, "k": pk, "d": "next"|"prev"} ou None (1re page)
+        Retourne (sql, params, backward): backward=True si les lignes sont lues
+        à l'envers (page précédente) et doivent être inversées par l'appelant.
+        """
+        asc = sort_order.lower() == "asc"
+        backward = cursor is not None and cursor["d"] == "prev"
+        params = dict(query.params)
+        conditions: List[str] = []
+        s, k = f'"{sort_col}"', f'"{pk_field}"'
+
+        # ordre de lecture: celui de la page, ou son exact inverse pour une page précédente
+        forward_asc = asc != backward
+        direction = "ASC" if forward_asc else "DESC"
+        if sort_col == pk_field:
+            order_clause = f" ORDER BY {k} {direction}"
+        else:
+            nulls = "NULLS FIRST" if backward else "NULLS LAST"
+            order_clause = f" ORDER BY {s} {direction} {nulls}, {k} {direction}"
+
+        if cursor is not None:
+            op = ">" if forward_asc else "<"
+            params["cursor_pk"] = cursor["k"]
+            if sort_col == pk_field:
+                conditions.append(f"{k} {op} :cursor_pk")
+            elif cursor.get("v") is not None:
+                params["cursor_value"] = cursor["v"]
+                if backward:
+                    # les NULL sont après la clé: jamais avant elle
+                    conditions.append(f"({s}, {k}) {op} (:cursor_value, :cursor_pk)")
+                else:
+                    conditions.append(f"(({s}, {k}) {op} (:cursor_value, :cursor_pk) OR {s} IS NULL)")
+            else:
+                if backward:
+                    conditions.append(f"({s} IS NOT NULL OR {k} {op} :cursor_pk)")
+                else:
+                    conditions.append(f"({s} IS NULL AND {k} {op} :cursor_pk)")
+
+        where_clause = query.where_clause
+        if conditions:
+            joined = " AND ".join(conditions)
+            where_clause = f"{where_clause} AND {joined}" if where_clause else f" WHERE {joined}"
+
+        params["limit"] = limit
+        sql = f"SELECT {query.select_clause} FROM {query.table}{where_clause}{order_clause} LIMIT :limit"
+        return sql, params, backward
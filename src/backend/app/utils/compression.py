@@ -0,0 +1,102 @@
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+
+COMPRESSIONS = ("gzip", "zstd")
+
+_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+_MEDIA_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+
+# Taille des morceaux envoyés au compresseur pour un contenu déjà en mémoire
+_CHUNK_SIZE = 64 * 1024
+
+
+def _require_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Compression zstd non disponible. Installez zstandard: pip install zstandard",
+        )
+    return zstandard
+
+
+def _new_compressor(compression: str):
+    if compression == "gzip":
+        # wbits=31: en-tête et pied gzip (et non zlib brut)
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "zstd":
+        return _require_zstandard().ZstdCompressor(level=3).compressobj()
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Compression inconnue '{compression}'. Valeurs autorisées: {list(COMPRESSIONS)}",
+    )
+
+
+def compress_stream(chunks: Iterable[Union[str, bytes]], compression: str) -> Iterator[bytes]:
+    """
+    Compresse un flux au fil de l'eau (str encodées en UTF-8): chaque morceau
+    est compressé dès qu'il arrive, rien n'est accumulé en mémoire.
+    Le compresseur est créé immédiatement (erreur levée avant le début de la réponse).
+    """
+    compressor = _new_compressor(compression)
+
+    def _compressed() -> Iterator[bytes]:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    return _compressed()
+
+
+def iter_bytes(content: Union[str, bytes], chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+    """Découpe un contenu déjà en mémoire en morceaux (pour compress_stream)."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+def accepts_encoding(accept_encoding: Optional[str], compression: str) -> bool:
+    """Vrai si l'en-tête Accept-Encoding du client accepte ce codage (q > 0)."""
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() != compression:
+            continue
+        params = params.strip().replace(" ", "")
+        return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def compressed_response_meta(
+    compression: str,
+    accept_encoding: Optional[str],
+    filename: str,
+    media_type: str,
+) -> Tuple[str, Dict[str, str]]:
+    """
+    (media_type, en-têtes) d'une réponse compressée, après vérification que la
+    compression est disponible (erreur levée avant l'ETag / le 304):
+      - le client accepte le codage -> Content-Encoding, fichier et type d'origine
+        (décompressé de façon transparente par le navigateur / curl --compressed)
+      - sinon -> artefact compressé: table.csv.gz / table.csv.zst
+    """
+    _new_compressor(compression)
+    if accepts_encoding(accept_encoding, compression):
+        return media_type, {
+            "Content-Encoding": compression,
+            "Vary": "Accept-Encoding",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        }
+    return _MEDIA_TYPES[compression], {
+        "Vary": "Accept-Encoding",
+        "Content-Disposition": f'attachment; filename="{filename}{_EXTENSIONS[compression]}"',
+    }
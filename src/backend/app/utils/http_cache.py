@@ -0,0 +1,92 @@
+import hashlib
+import json
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from fastapi import Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.export_cache import export_cache
+
+_FILE_CHUNK_SIZE = 256 * 1024
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    ETag faible à partir des éléments qui déterminent le contenu
+    (versions des tables, paramètres de l'export...).
+    Faible: l'ordre des lignes d'un export non trié n'est pas garanti octet pour octet.
+    """
+    serialized = json.dumps(parts, default=str, sort_keys=True, ensure_ascii=False)
+    return f'W/"{hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:40]}"'
+
+
+def _opaque(etag: str) -> str:
+    return etag.strip().removeprefix("W/").strip('"')
+
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparaison faible de If-None-Match (liste ou '*') avec l'ETag courant."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in if_none_match.split(","))
+
+
+def as_bytes(chunks: Iterable[Union[str, bytes]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def iter_file(handle: BinaryIO, chunk_size: int = _FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    try:
+        while True:
+            data = handle.read(chunk_size)
+            if not data:
+                break
+            yield data
+    finally:
+        handle.close()
+
+
+def cached_export_response(
+    etag: str,
+    if_none_match: Optional[str],
+    media_type: str,
+    headers: Dict[str, str],
+    produce: Callable[[], Iterable[bytes]],
+    should_cache: Optional[Callable[[], bool]] = None,
+) -> Response:
+    """
+    Réponse d'export avec ETag:
+      - If-None-Match correspond -> 304 sans corps
+      - export déjà en cache disque -> servi depuis le fichier
+      - sinon produce() est appelé et le flux est mis en cache au passage
+        (sauf si should_cache(), évalué après produce(), renvoie False)
+    """
+    headers = {
+        **headers,
+        "ETag": etag,
+        # le navigateur garde le fichier mais revalide à chaque fois (If-None-Match)
+        "Cache-Control": "private, no-cache",
+    }
+    if is_not_modified(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={k: v for k, v in headers.items() if k in ("ETag", "Cache-Control", "Vary")},
+        )
+
+    key = _opaque(etag)
+    cached = export_cache.open(key)
+    if cached is not None:
+        return StreamingResponse(iter_file(cached), media_type=media_type, headers=headers)
+
+    chunks = produce()
+    if should_cache is not None and not should_cache():
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+    return StreamingResponse(
+        export_cache.store_stream(key, chunks),
+        media_type=media_type,
+        headers=headers,
+    )
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import DDL, Index, event
+
+from app.core.database import Base
+
+# Colonne de recherche globale: texte de toutes les colonnes de la nomenclature,
+# indexé en trigrammes (pg_trgm) pour que search=... soit une lecture d'index
+SEARCH_DOCUMENT_COLUMN = "search_document"
+
+# Les valeurs importées sont normalisées (sans retour à la ligne): un terme
+# recherché ne peut pas correspondre à cheval sur deux colonnes
+_SEPARATOR = "\n"
+
+
+def build_search_document(payload: Dict[str, Any], columns: List[str]) -> str:
+    """Document de recherche d'une ligne (mêmes valeurs que search_document_sql)."""
+    return _SEPARATOR.join(str(payload[col]) for col in columns if payload.get(col) is not None)
+
+
+def search_document_sql(columns: List[str]) -> str:
+    """Expression SQL équivalente à build_search_document (backfill des lignes existantes)."""
+    cols = ", ".join(f'"{col}"::text' for col in columns)
+    return f"concat_ws(E'\\n', {cols})"
+
+
+def search_document_index(table: str) -> Index:
+    """Index GIN trigrammes de search_document (même nom que migrations/add_search_document.py)."""
+    return Index(
+        f"idx_{table}_search_document_trgm",
+        SEARCH_DOCUMENT_COLUMN,
+        postgresql_using="gin",
+        postgresql_ops={SEARCH_DOCUMENT_COLUMN: "gin_trgm_ops"},
+    )
+
+
+# Base neuve (init_db / create_all): l'extension doit exister avant les index gin_trgm_ops
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
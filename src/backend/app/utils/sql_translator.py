@@ -1,24 +1,77 @@
+import re
+from typing import Any, Dict, Tuple
+
+from app.core.indicator_cache import spec_hash
 from app.utils.normalization import normalize_text_value
 
+# À incrémenter à chaque changement du SQL généré: les indicateurs enregistrés
+# avec une version antérieure sont recompilés (migrations/recompile_indicators.py)
+TRANSLATOR_VERSION = 4
+
+
+def render_sql(sql: str, params: Dict[str, Any]) -> str:
+    """
+    SQL lisible (affichage): paramètres remplacés par leurs littéraux,
+    identique au SQL qu'inlinait le traducteur avant les paramètres liés.
+    """
+    if not params:
+        return sql
+
+    def _literal(match: re.Match) -> str:
+        name = match.group(1)
+        if name not in params:
+            return match.group(0)
+        value = params[name]
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return str(value)
+        escaped = str(value).replace("'", "''")
+        return f"'{escaped}'"
+
+    return re.sub(r"(?<![:\w]):(\w+)", _literal, sql)
+
 
 class JsonToSqlTranslator:
-    def __init__(self, spec: dict):
+    def __init__(self, spec: dict, param_prefix: str = "p"):
+        """
+        param_prefix: préfixe des paramètres liés (:p0, :p1...) ; à changer pour
+        combiner plusieurs indicateurs dans une même requête sans collision.
+        """
         self.spec = spec
+        self.param_prefix = param_prefix
+        self._params: Dict[str, Any] = {}
 
     # ---------- PUBLIC ----------
     def to_sql(self) -> str:
+        """SQL avec les littéraux inlinés (affichage)."""
+        return render_sql(*self.to_sql_params())
+
+    def to_sql_params(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        SQL avec les littéraux en paramètres liés (:p0, :p1...) et leurs valeurs.
+        Deux indicateurs de même structure produisent le même texte SQL: une
+        requête préparée (et son plan) peut être réutilisée.
+        """
+        self._params = {}
         select_clauses = []
         group_by_clauses = []
+        # positions (1..n) des colonnes de regroupement: ordre des lignes déterministe
+        order_positions = []
 
         for col in self.spec.get("colonnes", []):
             if col["type"] == "group_by":
-                expr = self._expr(col.get("expr"))
+                expr = self._select_expr(col.get("expr"))
                 select_clauses.append(f"{expr} AS \"{col['titre']}\"")
                 group_by_clauses.append(expr)
+                order_positions.append(str(len(select_clauses)))
             elif col["type"] == "case":
                 case_sql = self._case(col)
                 select_clauses.append(f"{case_sql} AS \"{col['titre']}\"")
                 group_by_clauses.append(case_sql)
+                order_positions.append(str(len(select_clauses)))
             elif col["type"] == "aggregation":
                 expr = self._aggregation_expr(col.get("expr", {}))
                 select_clauses.append(f"{expr} AS \"{col['titre']}\"")
@@ -33,8 +86,72 @@ class JsonToSqlTranslator:
             sql += "\n" + where_clause
         if group_by_clause:
             sql += "\n" + group_by_clause
+            sql += "\nORDER BY " + ", ".join(order_positions)
+
+        return sql + ";", dict(self._params)
 
-        return sql + ";"
+    def ordering_columns(self) -> list[str]:
+        """Titres des colonnes qui ordonnent le résultat (ORDER BY de to_sql_params), dans l'ordre."""
+        return [
+            col["titre"]
+            for col in self.spec.get("colonnes", [])
+            if col.get("type") in ("group_by", "case")
+        ]
+
+    def filtered_aggregations(self) -> Tuple[list[Tuple[str, str]], str | None, Dict[str, Any]]:
+        """
+        Forme « fusionnable » d'un indicateur sans GROUP BY: chaque agrégation devient
+        AGG(...) FILTER (WHERE conditions du sujet), calculable dans une requête partagée
+        avec d'autres indicateurs de la même table (cf. ReportPlanner).
+        Retourne ([(expression, titre)], condition du sujet ou None, paramètres liés).
+        """
+        self._params = {}
+        conditions = self.spec.get("sujet", {}).get("conditions")
+        where = self._condition(conditions) if conditions else None
+
+        expressions = []
+        for col in self.spec.get("colonnes", []):
+            expr = self._aggregation(col["expr"])
+            if where:
+                expr = f"{expr} FILTER (WHERE {where})"
+            expressions.append((expr, col["titre"]))
+        return expressions, where, dict(self._params)
+
+    def referenced_columns(self) -> list[str]:
+        """Colonnes citées par l'indicateur ({"col": ...}), telles qu'écrites dans le JSON."""
+        columns: list[str] = []
+
+        def _walk(node) -> None:
+            if isinstance(node, dict):
+                col = node.get("col")
+                if isinstance(col, str) and col not in ("1", "*") and col not in columns:
+                    columns.append(col)
+                for value in node.values():
+                    _walk(value)
+            elif isinstance(node, list):
+                for item in node:
+                    _walk(item)
+
+        _walk(self.spec)
+        return columns
+
+    def referenced_tables(self) -> list[str]:
+        """Tables lues par l'indicateur (sujet principal et sous-sujets des agrégations)."""
+        tables: list[str] = []
+
+        def _walk(node) -> None:
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if key == "tables" and isinstance(value, list):
+                        tables.extend(t for t in value if isinstance(t, str) and t not in tables)
+                    else:
+                        _walk(value)
+            elif isinstance(node, list):
+                for item in node:
+                    _walk(item)
+
+        _walk(self.spec)
+        return tables
 
     # ---------- FROM / WHERE ----------
     def _from(self) -> str:
@@ -60,17 +177,45 @@ class JsonToSqlTranslator:
         return "GROUP BY " + ", ".join(clauses)
 
     # ---------- EXPRESSIONS ----------
+    def _bind(self, value: Any) -> str:
+        """Littéral -> paramètre lié (jamais inliné dans le SQL)."""
+        name = f"{self.param_prefix}{len(self._params)}"
+        self._params[name] = value
+        return f":{name}"
+
+    def _typed_bind(self, value: Any) -> str:
+        """
+        Littéral lié avec un type explicite: dans un SELECT / GROUP BY, PostgreSQL
+        ne peut pas déduire le type d'un paramètre nu ($n) à la préparation.
+        """
+        if isinstance(value, bool):
+            sql_type = "BOOLEAN"
+        elif isinstance(value, int):
+            sql_type = "BIGINT"
+        elif isinstance(value, float):
+            sql_type = "DOUBLE PRECISION"
+        else:
+            sql_type = "TEXT"
+        return f"CAST({self._bind(value)} AS {sql_type})"
+
+    def _select_expr(self, expr) -> str:
+        """Comme _expr, pour une expression projetée (SELECT / GROUP BY): littéraux typés."""
+        if isinstance(expr, (int, float)):
+            return self._typed_bind(expr)
+        if isinstance(expr, str):
+            return self._typed_bind(normalize_text_value(expr))
+        return self._expr(expr)
+
+    def _is_param(self, sql: str) -> bool:
+        return sql.startswith(":") and sql[1:] in self._params
+
     def _expr(self, expr) -> str:
         if expr is None:
             return "NULL"
         if isinstance(expr, (int, float)):
-            return str(expr)
-        if isinstance(expr, bool):
-            return "TRUE" if expr else "FALSE"
+            return self._bind(expr)
         if isinstance(expr, str):
-            normalized = normalize_text_value(expr)
-            escaped = normalized.replace("'", "''")
-            return f"'{escaped}'"
+            return self._bind(normalize_text_value(expr))
         if isinstance(expr, dict):
             if "col" in expr:
                 return expr["col"]
@@ -100,7 +245,7 @@ class JsonToSqlTranslator:
             return self._aggregation(expr)
 
         else:
-            return self._expr(expr)
+            return self._select_expr(expr)
 
     def _aggregation(self, agg: dict) -> str:
         func = agg.get("agg", "").lower()
@@ -142,9 +287,7 @@ class JsonToSqlTranslator:
         parts = ["CASE"]
         for c in col["cases"]:
             when = self._condition(c["when"])
-            label_norm = normalize_text_value(c["label"])
-            label_escaped = label_norm.replace("'", "''")
-            then = f"'{label_escaped}'"
+            then = self._typed_bind(normalize_text_value(c["label"]))
             parts.append(f"  WHEN {when} THEN {then}")
         parts.append("END")
         return " ".join(parts)
@@ -180,10 +323,11 @@ class JsonToSqlTranslator:
 
             # LIKE handling
             if op.lower() in ("like", "not_like"):
-                if not right_expr.startswith("'") or not right_expr.endswith("'"):
-                    normalized = normalize_text_value(str(right))
-                    escaped = normalized.replace("'", "''")
-                    right_expr = f"'{escaped}'"
+                if self._is_param(right_expr):
+                    # motif toujours texte (un nombre lié casserait ILIKE)
+                    self._params[right_expr[1:]] = normalize_text_value(str(right))
+                else:
+                    right_expr = self._bind(normalize_text_value(str(right)))
                 return f"{left_expr} ILIKE {right_expr}" if op.lower() == "like" else f"{left_expr} NOT ILIKE {right_expr}"
 
             # Nouvelle logique : "=" ou "!=" avec % devient ILIKE / NOT ILIKE
@@ -201,3 +345,24 @@ class JsonToSqlTranslator:
             return f"{left_expr} {op} {right_expr}"
 
         raise ValueError(f"Condition inconnue : {cond}")
+
+
+def compile_indicator(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compilation d'un indicateur enregistré (colonnes du même nom sur Indicator):
+    SQL généré et ses paramètres liés, tables et colonnes lues, empreinte du JSON et version du traducteur.
+    Un indicateur non traduisible garde compiled_sql à None (erreur remontée à l'exécution).
+    """
+    translator = JsonToSqlTranslator(spec)
+    try:
+        compiled_sql, compiled_params = translator.to_sql_params()
+    except Exception:
+        compiled_sql, compiled_params = None, None
+    return {
+        "compiled_sql": compiled_sql,
+        "compiled_params": compiled_params,
+        "referenced_tables": translator.referenced_tables(),
+        "referenced_columns": translator.referenced_columns(),
+        "spec_hash": spec_hash(spec),
+        "translator_version": TRANSLATOR_VERSION,
+    }
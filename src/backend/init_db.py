@@ -20,6 +20,7 @@ from app.models.report import Report  # noqa: F401
 from app.models.insertion import Insertion  # noqa: F401
 from app.models.etudiants import Etudiants  # noqa: F401
 from app.models.mobilite import Mobilite  # noqa: F401
+from app.models.table_version import TableVersion  # noqa: F401
 
 from app.seed import seed_users, seed_predefined_indicators
 
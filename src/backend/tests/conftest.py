@@ -0,0 +1,5 @@
+import os
+import sys
+
+# les tests importent le paquet app depuis src/backend (pytest lancé depuis n'importe où)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
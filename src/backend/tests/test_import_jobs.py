@@ -0,0 +1,83 @@
+"""ETA des imports en arrière-plan: octets lus (_CountingReader) rapportés à la taille du fichier."""
+import io
+import time
+
+import pytest
+
+from app.services.csv_import_service import ImportProgress
+from app.services.import_job_service import ImportJob, _CountingReader
+
+
+@pytest.fixture
+def upload(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"x" * 1000)
+    return str(path)
+
+
+def _running_job(path: str, file_format: str, elapsed: float, bytes_read: int) -> ImportJob:
+    job = ImportJob("etudiants", "upload", "batch", None, path, created_by=1, file_format=file_format)
+    job.status = "running"
+    job._started_monotonic = time.monotonic() - elapsed
+    job.progress.bytes_read = bytes_read
+    return job
+
+
+def test_csv_eta_from_bytes_read(upload):
+    # un quart du fichier lu en 10 s -> encore 30 s
+    job = _running_job(upload, "csv", elapsed=10.0, bytes_read=250)
+
+    assert job.to_dict()["eta_seconds"] == pytest.approx(30.0, abs=0.5)
+
+
+def test_xlsx_has_no_byte_eta(upload):
+    job = _running_job(upload, "xlsx", elapsed=10.0, bytes_read=250)
+
+    assert job.to_dict()["eta_seconds"] is None
+
+
+def test_finished_job_eta_is_zero(upload):
+    job = _running_job(upload, "csv", elapsed=10.0, bytes_read=1000)
+    job.status = "completed"
+    job._finished_monotonic = time.monotonic()
+
+    assert job.to_dict()["eta_seconds"] == 0.0
+
+
+def test_counting_reader_seek_resets_bytes_read():
+    progress = ImportProgress()
+    reader = _CountingReader(io.BytesIO(b"a" * 100), progress)
+
+    reader.read(60)
+    assert progress.bytes_read == 60
+
+    # relecture après validation de l'encodage: pas de double comptage
+    reader.seek(0)
+    assert progress.bytes_read == 0
+    reader.read()
+    assert progress.bytes_read == 100
+    assert progress.bytes_read == reader.tell()
+
+
+def test_csv_import_reads_each_byte_once(monkeypatch):
+    from collections import Counter
+    from unittest.mock import MagicMock
+
+    from app.services.csv_import_service import CsvImportService
+
+    content = ("id_polytech;filiere\n" + "".join(f"E{i};INFO\n" for i in range(20000))).encode("utf-8")
+    dao = MagicMock()
+    dao.normalize_pk.side_effect = lambda value: value
+    dao.upsert_many.side_effect = lambda db, payloads: Counter(inserted=len(payloads), updated=0)
+    service = CsvImportService()
+    service._dao_by_table = {"etudiants": ("id_polytech", dao)}
+    monkeypatch.setattr(service, "_get_expected_columns", lambda table: ["id_polytech", "filiere"])
+    service.materialized = MagicMock()
+
+    progress = ImportProgress()
+    service.import_stream(
+        MagicMock(), "etudiants", _CountingReader(io.BytesIO(content), progress), progress=progress
+    )
+
+    # la validation UTF-8 (lecture puis retour en tête) ne gonfle pas le compteur
+    assert progress.bytes_read == len(content)
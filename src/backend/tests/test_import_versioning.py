@@ -0,0 +1,111 @@
+"""
+Version des tables publiée par les imports (clé des caches d'export et d'indicateurs).
+Aucune base: session et DAO simulés (MagicMock).
+"""
+import io
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.csv_import_service import CsvImportService, ImportCancelled, ImportProgress
+
+TABLE = "etudiants"
+
+
+def _csv(rows: int) -> io.BytesIO:
+    lines = ["id_polytech;filiere"] + [f"E{i};INFO" for i in range(rows)]
+    return io.BytesIO(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+@pytest.fixture
+def dao():
+    dao = MagicMock()
+    dao.normalize_pk.side_effect = lambda value: value
+    dao.upsert_many.side_effect = lambda db, payloads: Counter(inserted=len(payloads), updated=0)
+    return dao
+
+
+@pytest.fixture
+def service(dao, monkeypatch):
+    service = CsvImportService()
+    service._dao_by_table = {TABLE: ("id_polytech", dao)}
+    monkeypatch.setattr(service, "_get_expected_columns", lambda table: ["id_polytech", "filiere"])
+    service.materialized = MagicMock()
+    service.materialized.refresh_for_tables.return_value = []
+    return service
+
+
+def test_batch_import_bumps_version_with_each_committed_batch(service, dao):
+    db = MagicMock()
+
+    result = service.import_stream(db, TABLE, _csv(5), mode="batch", batch_size=2)
+
+    assert result["upserted_rows"] == 5
+    # 3 lots (2 + 2 + 1), chacun publié avec son commit
+    assert dao.versions.bump.call_count == 3
+    dao.versions.bump.assert_called_with(db, TABLE)
+    service.materialized.refresh_for_tables.assert_called_once_with(db, [TABLE])
+
+
+def test_batch_import_of_unchanged_rows_keeps_version(service, dao):
+    dao.upsert_many.side_effect = lambda db, payloads: Counter(inserted=0, updated=0)
+    db = MagicMock()
+
+    result = service.import_stream(db, TABLE, _csv(3), mode="batch", batch_size=2)
+
+    assert result["unchanged_rows"] == 3
+    dao.versions.bump.assert_not_called()
+    service.materialized.refresh_for_tables.assert_not_called()
+
+
+def test_bulk_import_bumps_version_once(service, dao):
+    def _copy_merge(db, columns, rows):
+        list(rows)
+        return Counter(inserted=2, updated=1)
+
+    dao.copy_merge.side_effect = _copy_merge
+    db = MagicMock()
+
+    result = service.import_stream(db, TABLE, _csv(3), mode="bulk")
+
+    assert result["upserted_rows"] == 3
+    dao.versions.bump.assert_called_once_with(db, TABLE)
+
+
+def test_cancelled_row_import_publishes_committed_rows(service, dao):
+    progress = ImportProgress()
+
+    def _upsert(db, payload):
+        # annulation demandée pendant la deuxième ligne (déjà commitée par le DAO)
+        if dao.upsert.call_count == 2:
+            progress.cancel()
+
+    dao.upsert.side_effect = _upsert
+    db = MagicMock()
+
+    with pytest.raises(ImportCancelled):
+        service.import_stream(db, TABLE, _csv(5), mode="row", progress=progress)
+
+    assert dao.upsert.call_count == 2
+    dao.versions.bump.assert_called_once_with(db, TABLE)
+    db.commit.assert_called()
+    service.materialized.refresh_for_tables.assert_called_once_with(db, [TABLE])
+
+
+def test_cancelled_batch_import_refreshes_views_without_extra_bump(service, dao):
+    progress = ImportProgress()
+
+    def _upsert_many(db, payloads):
+        progress.cancel()
+        return Counter(inserted=len(payloads), updated=0)
+
+    dao.upsert_many.side_effect = _upsert_many
+    db = MagicMock()
+
+    with pytest.raises(ImportCancelled):
+        service.import_stream(db, TABLE, _csv(5), mode="batch", batch_size=2, progress=progress)
+
+    # seul le lot commité a publié une version (dans _flush)
+    dao.versions.bump.assert_called_once_with(db, TABLE)
+    service.materialized.refresh_for_tables.assert_called_once_with(db, [TABLE])
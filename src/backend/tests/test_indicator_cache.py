@@ -0,0 +1,26 @@
+"""Cache des résultats d'indicateurs: entrées isolées des modifications des appelants."""
+from app.core.indicator_cache import IndicatorResultCache
+
+
+def test_cached_rows_are_not_shared_with_callers():
+    cache = IndicatorResultCache(max_entries=10, max_bytes=10_000)
+    result = {"columns": ["Nombre"], "rows": [{"Nombre": 3}]}
+    cache.put("k", result)
+
+    # l'appelant met en forme ses lignes après coup (ex: export de rapport)
+    result["rows"][0]["Nombre"] = "3"
+    cache.get("k")["rows"].append({"Nombre": 0})
+
+    assert cache.get("k") == {"columns": ["Nombre"], "rows": [{"Nombre": 3}]}
+
+
+def test_lru_eviction_by_entry_count():
+    cache = IndicatorResultCache(max_entries=2, max_bytes=10_000)
+    cache.put("a", {"rows": []})
+    cache.put("b", {"rows": []})
+    cache.get("a")
+    cache.put("c", {"rows": []})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
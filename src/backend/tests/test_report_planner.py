@@ -0,0 +1,90 @@
+"""Fusion des indicateurs scalaires d'un rapport (ReportPlanner) et redécoupage du résultat."""
+from app.services.report_planner import FusedQuery, ReportPlanner
+
+
+def _scalar(table: str, title: str, conditions=None) -> dict:
+    spec = {
+        "sujet": {"tables": [table]},
+        "colonnes": [{"type": "aggregation", "titre": title, "expr": {"agg": "count"}}],
+    }
+    if conditions is not None:
+        spec["sujet"]["conditions"] = conditions
+    return spec
+
+
+def test_scalar_indicators_on_same_table_are_fused():
+    grouped = {
+        "sujet": {"tables": ["etudiants"]},
+        "colonnes": [
+            {"type": "group_by", "titre": "Filière", "expr": {"col": "filiere"}},
+            {"type": "aggregation", "titre": "Nombre", "expr": {"agg": "count"}},
+        ],
+    }
+    plan = ReportPlanner().plan([
+        (1, _scalar("etudiants", "Femmes", [{"=": [{"col": "sexe"}, "F"]}])),
+        (2, _scalar("etudiants", "Hommes", [{"=": [{"col": "sexe"}, "M"]}])),
+        (3, _scalar("mobilite", "Mobilités")),
+        (4, grouped),
+    ])
+
+    # mobilite: seul de sa table ; 4: GROUP BY, exécuté seul
+    assert len(plan) == 1
+    fused = plan[0]
+    assert fused.table == "etudiants"
+    assert [indicator_id for indicator_id, _ in fused.members] == [1, 2]
+    assert "FILTER (WHERE" in fused.sql
+    assert "\nWHERE (" in fused.sql and " OR " in fused.sql
+    # préfixes distincts: aucun paramètre d'un indicateur n'écrase celui d'un autre
+    assert len(fused.params) == 2 and set(fused.params.values()) == {"f", "m"}
+
+
+def test_malformed_indicator_is_left_out_of_the_fused_query():
+    malformed = _scalar("etudiants", "Cassé", [{"=": ["sans opérande droit"]}])
+
+    plan = ReportPlanner().plan([
+        (1, _scalar("etudiants", "Total")),
+        (2, malformed),
+        (3, _scalar("etudiants", "Femmes", [{"=": [{"col": "sexe"}, "F"]}])),
+    ])
+
+    assert len(plan) == 1
+    assert [indicator_id for indicator_id, _ in plan[0].members] == [1, 3]
+
+
+def test_group_reduced_to_one_indicator_is_not_fused():
+    malformed = _scalar("etudiants", "Cassé", [{"=": ["sans opérande droit"]}])
+
+    assert ReportPlanner().plan([(1, _scalar("etudiants", "Total")), (2, malformed)]) == []
+
+
+def test_split_returns_one_result_per_indicator():
+    fused = FusedQuery(
+        "etudiants",
+        "SELECT ...",
+        {},
+        [
+            (1, [("i0_c0", "Total")]),
+            (2, [("i1_c0", "Femmes"), ("i1_c1", "Hommes")]),
+        ],
+    )
+
+    results = fused.split({"i0_c0": 10, "i1_c0": 4, "i1_c1": 6})
+
+    assert results == {
+        1: (["Total"], [{"Total": 10}]),
+        2: (["Femmes", "Hommes"], [{"Femmes": 4, "Hommes": 6}]),
+    }
+
+
+def test_split_of_planned_query_uses_indicator_titles():
+    plan = ReportPlanner().plan([
+        (7, _scalar("etudiants", "Total")),
+        (8, _scalar("etudiants", "Femmes", [{"=": [{"col": "sexe"}, "F"]}])),
+    ])
+    fused = plan[0]
+    aliases = [alias for _, columns in fused.members for alias, _ in columns]
+
+    results = fused.split(dict(zip(aliases, [12, 5])))
+
+    assert results[7] == (["Total"], [{"Total": 12}])
+    assert results[8] == (["Femmes"], [{"Femmes": 5}])
@@ -0,0 +1,37 @@
+"""SQL paramétré du traducteur JSON -> SQL (exécuté via PREPARE, cf. execute_prepared)."""
+from app.utils.sql_translator import JsonToSqlTranslator
+
+
+def test_projected_literals_are_typed():
+    spec = {
+        "sujet": {"tables": ["mobilite"]},
+        "colonnes": [
+            {"type": "group_by", "titre": "Tous", "expr": "tous"},
+            {
+                "type": "case",
+                "titre": "Durée",
+                "cases": [{"when": {"<": [{"col": "nb_mois_etude"}, 4]}, "label": "court"}],
+            },
+            {"type": "aggregation", "titre": "Nombre", "expr": {"agg": "count"}},
+        ],
+    }
+
+    sql, params = JsonToSqlTranslator(spec).to_sql_params()
+
+    # valeurs projetées typées (PREPARE ne saurait pas typer un $n nu) ; conditions inchangées
+    assert 'CAST(:p0 AS TEXT) AS "Tous"' in sql
+    assert "WHEN nb_mois_etude < :p1 THEN CAST(:p2 AS TEXT) END" in sql
+    assert "GROUP BY CAST(:p0 AS TEXT), CASE" in sql
+    assert params == {"p0": "tous", "p1": 4, "p2": "court"}
+
+
+def test_condition_literals_stay_plain_parameters():
+    spec = {
+        "sujet": {"tables": ["mobilite"], "conditions": [{"=": [{"col": "diplome"}, "oui"]}]},
+        "colonnes": [{"type": "aggregation", "titre": "Nombre", "expr": {"agg": "count"}}],
+    }
+
+    sql, params = JsonToSqlTranslator(spec).to_sql_params()
+
+    assert "WHERE (diplome = :p0)" in sql
+    assert params == {"p0": "oui"}